@@ -1,99 +1,53 @@
 import streamlit as st
 import os
 import sys
-import shutil
-import re
-from transformers import MarianMTModel, MarianTokenizer
-import nltk
-from nltk.tokenize import sent_tokenize
-import subprocess
+import time
 import base64
+from dotenv import load_dotenv
 
 SRC_DIR = os.path.join(os.getcwd(), "src")
-CHUNKS_DIR = "chunks"
-TRANSLATED_OUTPUT = "translated_output.txt"
-FINAL_PDF = "final.pdf"
-DOC_PATH = "output.txt"
+# Served by Streamlit at app/static/ (enableStaticServing in .streamlit/config.toml)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+PREVIEW_CHARS = 1000
+JOB_POLL_SECONDS = 1.0
 
 sys.path.append(SRC_DIR)
 
-nltk.download("punkt", quiet=True)
-from src.extract_content import read_pdf_text, ask_gemini_to_process, save_to_txt
-from src.preprocess import preprocess_document
+# Heavy dependencies (torch, transformers, nltk data, Gemini, fitz) are
+# imported by the src modules on first use, not here, so the page renders
+# before any of them load
+load_dotenv()
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
+CHUNK_MODE = os.getenv("CHUNK_MODE", "tokens")
 
-def load_translation_model(direction="en_to_hi"):
-    model_name = "Helsinki-NLP/opus-mt-en-hi" if direction == "en_to_hi" else "Helsinki-NLP/opus-mt-hi-en"
-    tokenizer = MarianTokenizer.from_pretrained(model_name)
-    model = MarianMTModel.from_pretrained(model_name)
-    return tokenizer, model
+from src.model_registry import start_background_warm_up
+from src.jobs import get_job_manager, QueueFullError, QUEUED, RUNNING, FAILED, REBUILD, LAYOUT
+from src.instrumentation import serve_metrics
+from src.placeholders import parse_glossary
+from src.decoding import PROFILES, get_profile
+from src.artifact_store import get_artifact_store
+from src.memory_guard import low_memory_enabled
+from src.service_client import get_service_client
+from src.incremental import parse_alignment
 
-def intelligent_translate(text, tokenizer, model):
-    preserved = re.findall(r'\b[A-Z]{2,}\b', text)
-    for word in preserved:
-        text = text.replace(word, f"[{word}]")
-    
-    sentences = sent_tokenize(text)
-    translated_sentences = []
-    for sentence in sentences:
-        inputs = tokenizer(sentence, return_tensors="pt", truncation=True, padding=True)
-        outputs = model.generate(**inputs)
-        translated = tokenizer.decode(outputs[0], skip_special_tokens=True)
-        for word in preserved:
-            translated = translated.replace(f"[{word}]", word)
-        translated_sentences.append(translated)
-    
-    return "\n".join(translated_sentences)
+# In low-memory mode finished files are served from disk instead of being
+# base64-encoded into the page
+LOW_MEMORY = low_memory_enabled()
 
-def translate_chunks_to_text(input_folder="chunks", output_file="translated_output.txt", direction="en_to_hi"):
-    """
-    Translate chunks and save as text file
-    """
-    tokenizer, model = load_translation_model(direction)
-    
-    with open(output_file, "w", encoding="utf-8") as output:
-        output.write("TRANSLATED DOCUMENT\n")
-        output.write("="*60 + "\n\n")
-        
-        for filename in sorted(os.listdir(input_folder)):
-            if filename.endswith(".txt"):
-                with open(os.path.join(input_folder, filename), "r", encoding="utf-8") as f:
-                    text = f.read()
-                    translated = intelligent_translate(text, tokenizer, model)
-                    
-                    output.write(f"Section: {filename}\n")
-                    output.write("-" * 40 + "\n")
-                    output.write(translated)
-                    output.write("\n\n")
-    
-    print(f"✅ Translated text file created at: {output_file}")
-    return output_file
+# With a translation service the models live there; this process only extracts and renders
+translation_service = get_service_client()
+if translation_service is None:
+    start_background_warm_up()
+if os.getenv("METRICS_PORT"):
+    serve_metrics(int(os.getenv("METRICS_PORT")))
+job_manager = get_job_manager(static_dir=STATIC_DIR, batch_size=TRANSLATION_BATCH_SIZE, chunk_mode=CHUNK_MODE)
 
-def convert_txt_to_pdf():
-    """
-    Convert translated text to PDF using the txt_to_pdf.py script
-    """
-    try:
-        txt_to_pdf_path = os.path.join(SRC_DIR, "txt_to_pdf.py")
-        result = subprocess.run([sys.executable, txt_to_pdf_path], 
-                              capture_output=True, text=True, cwd=os.getcwd())
-        
-        if result.returncode == 0:
-            print("PDF conversion successful")
-            return True
-        else:
-            print(f" PDF conversion failed: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f" Error running PDF conversion: {str(e)}")
-        return False
-
-def display_pdf(pdf_path):
+def display_pdf(pdf_data):
     """
     Display PDF in Streamlit
     """
     try:
-        with open(pdf_path, "rb") as f:
-            base64_pdf = base64.b64encode(f.read()).decode('utf-8')
+        base64_pdf = base64.b64encode(pdf_data).decode('utf-8')
         
         pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="700" height="800" type="application/pdf"></iframe>'
         st.markdown(pdf_display, unsafe_allow_html=True)
@@ -102,19 +56,157 @@ def display_pdf(pdf_path):
         st.error(f"Error displaying PDF: {str(e)}")
         return False
 
-def get_pdf_download_link(pdf_path, filename):
+def display_pdf_url(url):
     """
-    Generate download link for PDF
+    Display a PDF the browser loads from `url`, in ranges, without it passing through the page
     """
-    try:
-        with open(pdf_path, "rb") as f:
-            pdf_data = f.read()
+    st.markdown(
+        f'<iframe src="{url}" width="700" height="800" type="application/pdf"></iframe>',
+        unsafe_allow_html=True
+    )
+
+def download_link(label, url, file_name):
+    st.markdown(f'<a href="{url}" download="{file_name}">{label}</a>', unsafe_allow_html=True)
+
+def read_preview(result):
+    """
+    First PREVIEW_CHARS characters of the translated text, and whether there is more
+    """
+    if "text" in result:
+        return result["text"][:PREVIEW_CHARS], len(result["text"]) > PREVIEW_CHARS
+    with open(result["text_path"], encoding="utf-8") as f:
+        preview = f.read(PREVIEW_CHARS)
+        return preview, bool(f.read(1))
+
+def show_results(job):
+    """
+    Show preview, downloads and statistics for a finished job
+    """
+    result = job.result
+    if job.mode == LAYOUT:
+        st.success(f"✅ Translated {result['chunks']} of {result['blocks']} text blocks in place on {result['pages']} pages")
+    else:
+        st.success(f"✅ Translated {result['chunks']} chunks from {result['pages']} pages into {result['pdf_pages']} PDF pages")
+
+    st.markdown("---")
+    st.subheader("📄 Translation Results")
+
+    text_name = f"translated_{job.filename.replace('.pdf', '.txt')}"
+    preview, truncated = read_preview(result)
+   
+    with st.expander("👀 Preview Translated Text"):
+        if truncated:
+            st.text_area(
+                "Content Preview",
+                preview + f"\n\n... (showing first {PREVIEW_CHARS} characters)",
+                height=200
+            )
+        else:
+            st.text_area("Full Content", preview, height=200)
+
+    st.subheader("📖 Final PDF")
+    pdf_size = 0
+    if os.path.exists(job.output_path):
+        pdf_size = os.path.getsize(job.output_path)
+        col1, col2 = st.columns(2)
+
+        if LOW_MEMORY:
+            pdf_url = f"app/static/{job_manager.publish(job, job.output_path)}"
+            display_pdf_url(pdf_url)
+            with col1:
+                if "text_path" in result:
+                    download_link("📥 Download Text File",
+                                  f"app/static/{job_manager.publish(job, result['text_path'])}", text_name)
+                else:
+                    st.download_button(label="📥 Download Text File", data=result["text"], file_name=text_name,
+                                       mime="text/plain")
+            with col2:
+                download_link("📥 Download PDF File", pdf_url, f"translated_{job.filename}")
+        else:
+            with open(job.output_path, "rb") as f:
+                pdf_data = f.read()
+
+            if not display_pdf(pdf_data):
+                st.info("PDF preview not available in this browser. Please download to view.")
         
-        b64_pdf = base64.b64encode(pdf_data).decode()
-        return pdf_data
-    except Exception as e:
-        st.error(f"Error creating download link: {str(e)}")
-        return None
+            with col1:
+                st.download_button(
+                    label="📥 Download Text File",
+                    data=result["text"],
+                    file_name=text_name,
+                    mime="text/plain"
+                )
+        
+            with col2:
+                st.download_button(
+                    label="📥 Download PDF File",
+                    data=pdf_data,
+                    file_name=f"translated_{job.filename}",
+                    mime="application/pdf",
+                    type="primary"
+                )
+
+        if os.path.exists(job.alignment_path):
+            label = "📥 Download Alignment (for the next revision)"
+            alignment_name = f"{os.path.splitext(job.filename)[0]}_alignment.jsonl"
+            if LOW_MEMORY:
+                download_link(label, f"app/static/{job_manager.publish(job, job.alignment_path)}", alignment_name)
+            else:
+                with open(job.alignment_path, "rb") as f:
+                    st.download_button(label=label, data=f.read(), file_name=alignment_name,
+                                       mime="application/x-ndjson")
+    else:
+        st.error("PDF file not found!")
+    
+    # Statistics
+    st.markdown("---")
+    st.subheader("📊 Statistics")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Characters", result.get("characters", len(result.get("text", ""))))
+    with col2:
+        st.metric("Words", result.get("words", len(result.get("text", "").split())))
+    with col3:
+        st.metric("Chunks Processed", result["chunks"])
+    with col4:
+        st.metric("PDF Size", f"{pdf_size:,} bytes")
+
+    stats = result.get("translation_stats")
+    if stats:
+        st.caption(
+            f"{stats['sentences']} sentences: {stats['duplicates']} repeated, {stats['passthrough']} copied as is, "
+            f"{stats['memory_hits']} from translation memory, {stats['translated']} translated "
+            f"({stats['saved']} model calls saved)"
+        )
+
+    incremental = result.get("incremental")
+    if incremental:
+        st.caption(
+            f"🔁 {incremental['translated']} of {incremental['sentences']} sentences translated "
+            f"({incremental['changed']} changed, {incremental['inserted']} new); {incremental['unchanged']} unchanged "
+            f"and {incremental['moved']} moved sentences reused from the previous version, "
+            f"{incremental['removed']} removed"
+        )
+
+    cache = result.get("cache")
+    if cache:
+        if cache["document"]:
+            reused = "the whole document"
+        else:
+            reused = f"{cache['chunks_reused']} of {result['chunks']} translated chunks"
+            if cache["stage"]:
+                reused += f", {cache['stage']} from an earlier run"
+        store = get_artifact_store()
+        store_rate = f" · cache hit rate since start: {store.hit_rate():.0%}" if store is not None else ""
+        st.caption(f"♻️ Reused {reused}{store_rate}")
+
+    memory = result.get("memory")
+    if memory:
+        limit = f" (limit {memory['limit_mb']:.0f} MB, extraction paused {memory['waits']} times)" if memory["limit_mb"] else ""
+        st.caption(f"🧠 Low-memory mode: peak RSS {memory['peak_rss_mb']} MB{limit}")
+
+    st.markdown("**⏱️ Time per stage**")
+    st.dataframe(job.tracer.summary(), use_container_width=True)
 
 st.title("📄 Hindi ↔ English PDF Translator")
 st.markdown("---")
@@ -131,16 +223,45 @@ direction = st.selectbox(
     help="Choose the direction for translation"
 )
 
+output_mode = st.radio(
+    "Output Layout",
+    [REBUILD, LAYOUT],
+    format_func=lambda mode: "Rebuild document (Gemini structuring)" if mode == REBUILD else "Keep original layout",
+    help="Keep original layout writes the translation over the original pages and skips Gemini"
+)
+
+profile = st.selectbox(
+    "Decoding Profile",
+    list(PROFILES),
+    index=list(PROFILES).index(get_profile().name),
+    format_func=lambda name: f"{name.capitalize()} ({PROFILES[name].description})",
+    help="Fast uses greedy decoding and suits bulk jobs; Quality searches 4 beams"
+)
+
+with st.expander("📚 Glossary (optional)"):
+    glossary_text = st.text_area(
+        "Terms to keep untranslated",
+        placeholder="One per line, e.g.\nQualiSoft\nSOP = मानक संचालन प्रक्रिया",
+        help="Acronyms are always kept. Write 'term = translation' to force a specific rendering."
+    )
+
+with st.expander("🔁 Revision of an earlier document (optional)"):
+    previous_alignment_file = st.file_uploader(
+        "Alignment file of the previous version",
+        type=["jsonl", "json"],
+        help="Download it from the results of the earlier translation. Only new or changed sentences are "
+             "translated; the rest is reused. Applies to the rebuild layout."
+    )
+
 if uploaded_pdf:
-    with open("temp.pdf", "wb") as f:
-        f.write(uploaded_pdf.read())
-    
     st.success("✅ PDF uploaded successfully.")
    
     file_details = {
         "Filename": uploaded_pdf.name,
         "File size": f"{uploaded_pdf.size} bytes",
-        "Translation direction": direction
+        "Translation direction": direction,
+        "Decoding profile": profile,
+        "Output layout": output_mode
     }
     
     with st.expander("📋 File Details"):
@@ -148,115 +269,42 @@ if uploaded_pdf:
             st.write(f"**{key}:** {value}")
 
     if st.button("🚀 Translate PDF", type="primary"):
-        try:
-            with st.spinner("🔍 Extracting content using Gemini..."):
-                text = read_pdf_text("temp.pdf")
-                output = ask_gemini_to_process(text)
-                save_to_txt(output)
-                st.success("✅ Text extracted and saved")
-
-            with st.spinner("📚 Chunking the text..."):
-                preprocess_document(DOC_PATH, CHUNKS_DIR)
-                st.success("✅ Document chunked successfully")
-
-            with st.spinner("🌐 Translating chunks... (This may take a while)"):
-                translated_file = translate_chunks_to_text(
-                    input_folder=CHUNKS_DIR,
-                    output_file=TRANSLATED_OUTPUT,
-                    direction="en_to_hi" if direction == "English to Hindi" else "hi_to_en"
+        previous_alignment = None
+        alignment_error = None
+        if previous_alignment_file:
+            try:
+                previous_alignment = parse_alignment(previous_alignment_file.getvalue().decode("utf-8"))
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError) as e:
+                alignment_error = f"The alignment file could not be read: {str(e)}"
+        if alignment_error:
+            st.error(alignment_error)
+        else:
+            try:
+                job = job_manager.submit(
+                    uploaded_pdf.getvalue(),
+                    uploaded_pdf.name,
+                    direction="en_to_hi" if direction == "English to Hindi" else "hi_to_en",
+                    glossary=parse_glossary(glossary_text) or None,
+                    mode=output_mode,
+                    profile=profile,
+                    previous_alignment=previous_alignment
                 )
-                st.success("✅ Translation completed!")
+                st.session_state["job_id"] = job.id
+            except QueueFullError as e:
+                st.warning(f"⏳ The server is busy: {str(e)}")
 
-            # Step 4: Convert to PDF
-            with st.spinner("📄 Converting to PDF..."):
-                pdf_success = convert_txt_to_pdf()
-                if pdf_success:
-                    st.success("✅ PDF conversion completed!")
-                else:
-                    st.error(" PDF conversion failed!")
-                    raise Exception("PDF conversion failed")
-
-            st.markdown("---")
-            st.subheader("📄 Translation Results")
-      
-            with open(translated_file, "r", encoding="utf-8") as f:
-                translated_content = f.read()
-           
-            with st.expander("👀 Preview Translated Text"):
-                preview_length = 1000
-                if len(translated_content) > preview_length:
-                    st.text_area(
-                        "Content Preview",
-                        translated_content[:preview_length] + "\n\n... (showing first 1000 characters)",
-                        height=200
-                    )
-                else:
-                    st.text_area("Full Content", translated_content, height=200)
-    
-            st.subheader("📖 Final PDF")
-            if os.path.exists(FINAL_PDF):
-                if not display_pdf(FINAL_PDF):
-                    st.info("PDF preview not available in this browser. Please download to view.")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.download_button(
-                        label="📥 Download Text File",
-                        data=translated_content,
-                        file_name=f"translated_{uploaded_pdf.name.replace('.pdf', '.txt')}",
-                        mime="text/plain"
-                    )
-                
-                with col2:
-                    pdf_data = get_pdf_download_link(FINAL_PDF, f"translated_{uploaded_pdf.name}")
-                    if pdf_data:
-                        st.download_button(
-                            label="📥 Download PDF File",
-                            data=pdf_data,
-                            file_name=f"translated_{uploaded_pdf.name}",
-                            mime="application/pdf",
-                            type="primary"
-                        )
-            else:
-                st.error("PDF file not found!")
-            
-            # Statistics
-            st.markdown("---")
-            st.subheader("📊 Statistics")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Characters", len(translated_content))
-            with col2:
-                st.metric("Words", len(translated_content.split()))
-            with col3:
-                chunk_count = len([f for f in os.listdir(CHUNKS_DIR) if f.endswith('.txt')]) if os.path.exists(CHUNKS_DIR) else 0
-                st.metric("Chunks Processed", chunk_count)
-            with col4:
-                pdf_size = os.path.getsize(FINAL_PDF) if os.path.exists(FINAL_PDF) else 0
-                st.metric("PDF Size", f"{pdf_size:,} bytes")
-
-        except Exception as e:
-            st.error(f"Error occurred during translation: {str(e)}")
-            st.info("Try uploading a different PDF")
-        
-        finally:
-            cleanup_files = ["temp.pdf", DOC_PATH]  
-            cleanup_dirs = [CHUNKS_DIR]
-            
-            for file_path in cleanup_files:
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except:
-                        pass
-            
-            for dir_path in cleanup_dirs:
-                if os.path.exists(dir_path):
-                    try:
-                        shutil.rmtree(dir_path)
-                    except:
-                        pass
+job = job_manager.get(st.session_state.get("job_id"))
+if job is not None:
+    state = job.snapshot()
+    if state["status"] in (QUEUED, RUNNING):
+        st.progress(state["progress"], text=state["message"])
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    elif state["status"] == FAILED:
+        st.error(f"Error occurred during translation: {state['error']}")
+        st.info("Try uploading a different PDF")
+    else:
+        show_results(job)
 
 with st.sidebar:
     st.header("ℹ️ Information")
@@ -282,18 +330,15 @@ with st.sidebar:
     
     st.markdown("---")
     st.markdown("**Note:** Translation may take several minutes for large documents.")
+    if translation_service is not None:
+        st.caption(f"Translating through the service at {translation_service.url}")
 
 with st.sidebar:
     st.markdown("---")
     if st.button("🧹 Clear All Files"):
-        cleanup_files = [TRANSLATED_OUTPUT, FINAL_PDF]
-        for file_path in cleanup_files:
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    st.success(f"Removed {file_path}")
-                except:
-                    st.error(f"Failed to remove {file_path}")
+        job_id = st.session_state.pop("job_id", None)
+        if job_id and job_manager.remove(job_id):
+            st.success("Removed translation files for this session")
 
 st.markdown("---")
 st.markdown(
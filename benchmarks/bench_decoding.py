@@ -0,0 +1,59 @@
+"""
+Latency and throughput of each decoding profile on a fixed local sample,
+with BLEU of every profile against the quality profile's output.
+
+    python benchmarks/bench_decoding.py --profiles fast balanced quality
+
+BLEU needs sacrebleu (pip install sacrebleu); without it only speed is
+reported.
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.decoding import PROFILES
+from src.model_registry import load_translation_model
+from src.translation import translate_batch, DEFAULT_BATCH_SIZE
+from benchmarks.compare_backends import SAMPLE, bleu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=SAMPLE, help="One sentence per line")
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per profile")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+    tokenizer, model = load_translation_model(args.direction, args.backend)
+
+    # Warm-up so the first profile doesn't pay for lazy initialization
+    translate_batch(sentences[:args.batch_size], tokenizer, model, args.batch_size, profile="fast")
+    reference = translate_batch(sentences, tokenizer, model, args.batch_size, profile="quality")
+
+    print(f"{len(sentences)} sentences, direction {args.direction}")
+    print(f"{'profile':>9} {'beams':>6} {'ms/sent':>8} {'sent/s':>8} {'out words':>10} {'BLEU vs quality':>16}")
+    for name in args.profiles:
+        profile = PROFILES[name]
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            outputs = translate_batch(sentences, tokenizer, model, args.batch_size, profile=profile)
+        elapsed = (time.perf_counter() - start) / args.repeat
+
+        score = bleu(outputs, reference)
+        score_text = "n/a" if score is None else f"{score:.1f}"
+        words = sum(len(output.split()) for output in outputs)
+        print(f"{name:>9} {profile.num_beams:>6} {1000 * elapsed / len(sentences):>8.1f} "
+              f"{len(sentences) / elapsed:>8.2f} {words:>10} {score_text:>16}")
+
+
+if __name__ == "__main__":
+    main()
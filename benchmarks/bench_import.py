@@ -0,0 +1,70 @@
+"""
+Cold import time of app.py and the src modules, each measured in a fresh
+interpreter, with the heavy dependencies each import pulls in.
+
+    python benchmarks/bench_import.py --repeat 5
+
+app.py is executed with runpy, as Streamlit does on the first page load
+(outside a server Streamlit only logs warnings for the widget calls).
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = ["app.py", "src.jobs", "src.pipeline", "src.translation", "src.preprocess", "src.extract_content",
+           "src.layout_translate"]
+HEAVY_MODULES = ["torch", "transformers", "nltk", "google.generativeai", "fitz", "reportlab", "onnxruntime"]
+
+PROBE = """
+import sys, time, json, runpy, logging
+logging.disable(logging.CRITICAL)
+target = sys.argv[1]
+start = time.perf_counter()
+if target.endswith(".py"):
+    runpy.run_path(target, run_name="__bench__")
+else:
+    __import__(target)
+elapsed = time.perf_counter() - start
+heavy = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+print(json.dumps({"seconds": elapsed, "heavy": heavy}))
+"""
+
+
+def measure(target):
+    env = dict(os.environ, TRANSLATION_WARMUP="")
+    completed = subprocess.run([sys.executable, "-c", PROBE, target, json.dumps(HEAVY_MODULES)], cwd=ROOT,
+                               env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None, completed.stderr.strip().splitlines()[-1:]
+    return json.loads(completed.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", default=TARGETS)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target (median is reported)")
+    args = parser.parse_args()
+
+    print(f"{'target':<22} {'median (s)':>10} {'min (s)':>8}  heavy modules loaded")
+    for target in args.targets:
+        runs = []
+        error = None
+        for _ in range(args.repeat):
+            result, error = measure(target)
+            if result is None:
+                break
+            runs.append(result)
+        if not runs:
+            print(f"{target:<22} {'failed':>10}           {' '.join(error or [])}")
+            continue
+        times = [run["seconds"] for run in runs]
+        print(f"{target:<22} {statistics.median(times):>10.3f} {min(times):>8.3f}  {', '.join(runs[-1]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Reproducible per-stage and end-to-end benchmark on synthetic documents of
+growing size built from the bundled sample PDF.
+
+Gemini is replaced by a deterministic local stub and, with --model tiny
+(the default), MarianMT by a small randomly initialized model with a
+word-level tokenizer, so the run needs no network or downloads. Use
+--model marian to measure the real pretrained model instead.
+
+    python benchmarks/bench_pipeline.py --pages 10 100 1000 --output results.json
+    python benchmarks/bench_pipeline.py --save-baseline      # record a new baseline
+    python benchmarks/bench_pipeline.py                      # compare against it
+
+Exits with status 1 when a stage is slower than the baseline by more than
+--tolerance, or when there is no baseline to compare against. Timings
+depend on the machine, so no baseline is committed; record one with
+--save-baseline first.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Cached Gemini responses, translations and artifacts would hide the work being measured
+os.environ["GEMINI_CACHE_DIR"] = ""
+os.environ["TRANSLATION_MEMORY_PATH"] = ""
+os.environ["ARTIFACT_CACHE_DIR"] = ""
+
+from src.pdf_extract import extract_pages
+from src.gemini_structuring import structure_pages
+from src.preprocess import clean_text, split_into_chunks, split_into_token_chunks
+from src.translation import translate_texts, DEFAULT_BATCH_SIZE
+from src.txt_to_pdf import render_pdf
+from src.pipeline import run_pipeline
+from src.model_registry import registry, load_translation_model
+from src.instrumentation import Tracer, use_tracer, current_rss_bytes, peak_rss_bytes
+from benchmarks.stubs import StubGeminiClient, stub_build_prompt, tiny_marian, make_synthetic_pdf
+
+SAMPLE_PDF = os.path.join(ROOT, "data", "398b3383-67bd-43ee-8e90-6c3b331c13a2.pdf")
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+# Stages faster than this in both runs are too noisy to compare
+MIN_COMPARE_SECONDS = 0.05
+STAGES = ["extract", "structure", "chunk", "translate", "render", "pipeline"]
+
+
+def measure(name, fn, *args, **kwargs):
+    """
+    Run `fn` once under its own tracer and return (result, stats) where stats
+    holds wall time, items processed per unit, throughput and memory.
+    """
+    tracer = Tracer()
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    with use_tracer(tracer):
+        result = fn(*args, **kwargs)
+    seconds = time.perf_counter() - start
+
+    row = next((row for row in tracer.summary() if row["stage"] == name), {})
+    items = {k: v for k, v in row.items()
+             if k not in ("stage", "calls", "seconds", "peak_rss_mb") and not k.endswith("/sec")}
+    stats = {
+        "seconds": round(seconds, 4),
+        "items": items,
+        "throughput": {f"{unit}/sec": round(count / seconds, 2) for unit, count in items.items() if seconds > 0},
+        "rss_delta_mb": round((current_rss_bytes() - rss_before) / 2**20, 1),
+        "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+    }
+    return result, stats
+
+
+def bench_document(pdf_path, pages, args, client):
+    tokenizer, model = load_translation_model(args.direction)
+    results = {}
+
+    page_texts, results["extract"] = measure("extract", extract_pages, pdf_path)
+    structured, results["structure"] = measure(
+        "structure", structure_pages, page_texts, stub_build_prompt, client=client, cache=None)
+
+    text = clean_text("\n\n".join(structured))
+    if args.chunk_mode == "tokens":
+        chunks, results["chunk"] = measure("chunk", split_into_token_chunks, text, tokenizer)
+    else:
+        chunks, results["chunk"] = measure("chunk", split_into_chunks, text, args.max_words)
+    results["chunk"]["items"] = {"chunks": len(chunks)}
+    results["chunk"]["throughput"] = {"chunks/sec": round(len(chunks) / results["chunk"]["seconds"], 2)}
+
+    translations, results["translate"] = measure(
+        "translate", translate_texts, chunks, tokenizer, model, batch_size=args.batch_size)
+
+    lines = [line for translated in translations for line in translated.split("\n")]
+    _, results["render"] = measure("render", render_pdf, lines, io.BytesIO())
+
+    _, results["pipeline"] = measure(
+        "pipeline", run_pipeline, pdf_path, io.BytesIO(), args.direction, client=client,
+        build_prompt=stub_build_prompt, cache=None, batch_size=args.batch_size, chunk_mode=args.chunk_mode)
+    results["pipeline"]["items"] = {"pages": pages}
+    results["pipeline"]["throughput"] = {"pages/sec": round(pages / results["pipeline"]["seconds"], 2)}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the time of every (pages, stage) relative to the baseline and
+    return the entries slower than `tolerance` (e.g. 0.2 = 20%).
+    """
+    regressions = []
+    print(f"\n{'pages':>6} {'stage':<10} {'baseline':>9} {'now':>9} {'change':>8}")
+    for pages, stages in results["documents"].items():
+        for stage, stats in stages.items():
+            before = baseline.get("documents", {}).get(pages, {}).get(stage)
+            if not before or not before["seconds"]:
+                continue
+            change = stats["seconds"] / before["seconds"] - 1
+            noisy = max(stats["seconds"], before["seconds"]) < MIN_COMPARE_SECONDS
+            flag = "  REGRESSION" if change > tolerance and not noisy else ""
+            print(f"{pages:>6} {stage:<10} {before['seconds']:>9.3f} {stats['seconds']:>9.3f} {change:>+7.1%}{flag}")
+            if flag:
+                regressions.append((pages, stage, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=SAMPLE_PDF, help="PDF whose pages are repeated to build the documents")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--model", default="tiny", choices=["tiny", "marian"])
+    parser.add_argument("--chunk-mode", default="tokens", choices=["tokens", "words"])
+    parser.add_argument("--max-words", type=int, default=800)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="Simulated seconds per Gemini call")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a stage is flagged")
+    args = parser.parse_args()
+
+    if args.model == "tiny":
+        tokenizer, model = tiny_marian()
+        registry.register(args.direction, tokenizer, model)
+    client = StubGeminiClient(latency=args.gemini_latency)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cores": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "save_baseline")},
+        "documents": {},
+    }
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        for pages in args.pages:
+            pdf_path = make_synthetic_pdf(args.input, pages, os.path.join(workdir, f"doc_{pages}.pdf"))
+            stages = bench_document(pdf_path, pages, args, client)
+            results["documents"][str(pages)] = stages
+            print(f"\n{pages} pages")
+            for stage in STAGES:
+                stats = stages[stage]
+                throughput = ", ".join(f"{v} {k}" for k, v in stats["throughput"].items())
+                print(f"  {stage:<10} {stats['seconds']:>9.3f}s  {throughput:<50} "
+                      f"rss {stats['rss_delta_mb']:+.1f} MB, peak {stats['peak_rss_mb']} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nError: no baseline at {args.baseline}; record one on this machine with --save-baseline",
+              file=sys.stderr)
+        return 1
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != results["config"]:
+        print("\nWarning: baseline was recorded with different options")
+    regressions = compare(results, baseline, args.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Benchmark PDF rendering of translated_output.txt replicated 1x, 10x and
+100x: the previous wrap loop (measuring the whole growing line with
+canvas.stringWidth after every word) against src/pdf_layout.py.
+
+    python benchmarks/bench_render.py --factors 1 10 100
+"""
+import io
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+
+from src.txt_to_pdf import render_pdf, register_hindi_font
+
+SAMPLE_TEXT = os.path.join(ROOT, "translated_output.txt")
+
+
+def legacy_render(content, output):
+    font_name = register_hindi_font()
+    c = canvas.Canvas(output, pagesize=letter)
+    width, height = letter
+    c.setFont(font_name, 12)
+    margin = 72
+    y_position = height - margin
+    line_height = 14
+    max_width = width - 2 * margin
+
+    def draw(text):
+        nonlocal y_position
+        c.drawString(margin, y_position, text)
+        y_position -= line_height
+        if y_position < margin:
+            c.showPage()
+            c.setFont(font_name, 12)
+            y_position = height - margin
+
+    for line in content.split('\n'):
+        if c.stringWidth(line) <= max_width:
+            draw(line)
+            continue
+        current_line = ""
+        for word in line.split(' '):
+            test_line = current_line + " " + word if current_line else word
+            if c.stringWidth(test_line) <= max_width:
+                current_line = test_line
+            else:
+                if current_line:
+                    draw(current_line)
+                current_line = word
+        if current_line:
+            draw(current_line)
+    c.save()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=SAMPLE_TEXT)
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        sample = f.read()
+
+    register_hindi_font()
+    print(f"{'copies':>6} {'chars':>10} {'legacy (s)':>11} {'layout (s)':>11} {'speedup':>8}")
+    for factor in args.factors:
+        content = "\n".join([sample] * factor)
+        legacy = timed(legacy_render, content, io.BytesIO())
+        layout = timed(render_pdf, content, io.BytesIO())
+        print(f"{factor:>6} {len(content):>10,} {legacy:>11.3f} {layout:>11.3f} {legacy / layout:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the legacy one-sentence-per-generate() loop against the batched
+translation engine in src/translation.py.
+
+    python benchmarks/bench_translate.py --limit 200 --batch-size 16
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.placeholders import default_protector
+from src.translation import split_sentences, translate_batch, DEFAULT_BATCH_SIZE, DEFAULT_MAX_TOKENS
+
+SAMPLE_PDF = os.path.join(ROOT, "data", "398b3383-67bd-43ee-8e90-6c3b331c13a2.pdf")
+
+
+def load_sentences(path, limit):
+    if path.endswith(".pdf"):
+        import fitz
+        with fitz.open(path) as doc:
+            text = " ".join(page.get_text() for page in doc)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    text = " ".join(text.split())
+    protector = default_protector()
+    return [protector.protect(sentence)[0] for sentence in split_sentences(text)[:limit]]
+
+
+def per_sentence_loop(sentences, tokenizer, model):
+    results = []
+    for sentence in sentences:
+        inputs = tokenizer(sentence, return_tensors="pt", truncation=True, padding=True)
+        outputs = model.generate(**inputs)
+        results.append(tokenizer.decode(outputs[0], skip_special_tokens=True))
+    return results
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=SAMPLE_PDF, help="PDF or text file to take sentences from")
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--limit", type=int, default=200, help="Number of sentences to translate")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    args = parser.parse_args()
+
+    from src.convert import load_translation_model
+    tokenizer, model = load_translation_model(args.direction)
+    sentences = load_sentences(args.input, args.limit)
+    print(f"Sentences: {len(sentences)}")
+
+    _, loop_time = timed(per_sentence_loop, sentences, tokenizer, model)
+    _, batch_time = timed(translate_batch, sentences, tokenizer, model, args.batch_size, args.max_tokens)
+
+    print(f"per-sentence loop : {loop_time:8.2f}s  {len(sentences) / loop_time:8.2f} sentences/sec")
+    print(f"batched (bs={args.batch_size:<3}) : {batch_time:8.2f}s  {len(sentences) / batch_time:8.2f} sentences/sec")
+    print(f"speedup           : {loop_time / batch_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
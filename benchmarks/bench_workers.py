@@ -0,0 +1,57 @@
+"""
+Measure how chunk translation scales with the number of worker processes
+(torch threads are split as cores / workers).
+
+    python benchmarks/bench_workers.py --workers 1 2 4 8 --chunks 32
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.parallel_translate import ParallelTranslator, threads_per_worker
+from src.preprocess import split_into_chunks, clean_text
+
+SAMPLE_PDF = os.path.join(ROOT, "data", "398b3383-67bd-43ee-8e90-6c3b331c13a2.pdf")
+
+
+def load_chunks(path, count, max_words):
+    from src.pdf_extract import extract_text
+    chunks = split_into_chunks(clean_text(extract_text(path)), max_words=max_words)
+    # Repeat the sample until we have enough chunks to keep every worker busy
+    return [chunks[i % len(chunks)] for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=SAMPLE_PDF)
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunks", type=int, default=32)
+    parser.add_argument("--max-words", type=int, default=200)
+    args = parser.parse_args()
+
+    # Keep cached translations out of the measurement
+    os.environ["TRANSLATION_MEMORY_PATH"] = ""
+    chunks = load_chunks(args.input, args.chunks, args.max_words)
+    print(f"{args.chunks} chunks, {os.cpu_count()} cores")
+    print(f"{'workers':>7} {'threads':>7} {'time (s)':>9} {'chunks/s':>9} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        with ParallelTranslator(args.direction, workers) as translator:
+            # Warm-up so model loading isn't timed
+            translator.translate(chunks[:workers])
+            start = time.perf_counter()
+            translator.translate(chunks)
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {threads_per_worker(workers):>7} {elapsed:>9.2f} "
+              f"{len(chunks) / elapsed:>9.2f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare inference backends on a fixed local sample: sentences/sec and
+BLEU drift against the full-precision PyTorch output.
+
+    python benchmarks/compare_backends.py --backends torch int8 onnx
+
+BLEU needs sacrebleu (pip install sacrebleu); without it only speed is
+reported.
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.backends import BACKENDS
+from src.model_registry import load_translation_model
+from src.translation import translate_batch, DEFAULT_BATCH_SIZE
+
+SAMPLE = os.path.join(ROOT, "benchmarks", "fixtures", "sample_en.txt")
+
+
+def bleu(hypotheses, references):
+    try:
+        import sacrebleu
+    except ImportError:
+        return None
+    return sacrebleu.corpus_bleu(hypotheses, [references]).score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=SAMPLE, help="One sentence per line")
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per backend")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+
+    reference = None
+    print(f"{len(sentences)} sentences, direction {args.direction}")
+    print(f"{'backend':>8} {'load (s)':>9} {'sent/s':>8} {'size (MB)':>10} {'BLEU vs torch':>14}")
+
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        start = time.perf_counter()
+        tokenizer, model = load_translation_model(args.direction, backend)
+        load_time = time.perf_counter() - start
+
+        # First pass warms caches and gives the outputs to score
+        outputs = translate_batch(sentences, tokenizer, model, args.batch_size)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            translate_batch(sentences, tokenizer, model, args.batch_size)
+        rate = len(sentences) * args.repeat / (time.perf_counter() - start)
+
+        if reference is None:
+            reference = outputs
+        score = bleu(outputs, reference)
+        score_text = "n/a" if score is None else f"{score:.1f}"
+        print(f"{backend:>8} {load_time:>9.1f} {rate:>8.2f} {model.size_bytes() / 2**20:>10.1f} {score_text:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Offline stand-ins used by the benchmarks: a deterministic Gemini client, a
+word-level tokenizer and a tiny randomly initialized MarianMT model, plus a
+helper that builds large PDFs out of the bundled sample.
+"""
+import re
+import asyncio
+import zlib
+
+STUB_PROMPT_PREFIX = "Content:\n"
+TINY_MODEL_NAME = "tiny-random-marian"
+
+
+def stub_build_prompt(text):
+    return STUB_PROMPT_PREFIX + text
+
+
+class StubGeminiClient:
+    """
+    Returns the window text unchanged (whitespace normalized per line) after
+    an optional simulated delay of `latency` seconds plus `seconds_per_kchar`
+    per 1000 prompt characters. The same prompt always gives the same answer.
+    """
+
+    model_name = "stub-gemini"
+
+    def __init__(self, latency=0.0, seconds_per_kchar=0.0):
+        self.latency = latency
+        self.seconds_per_kchar = seconds_per_kchar
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        delay = self.latency + self.seconds_per_kchar * len(prompt) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        text = prompt.split(STUB_PROMPT_PREFIX, 1)[-1]
+        return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+
+class StubTokenizer:
+    """
+    Word-level tokenizer hashing every word / punctuation mark into a fixed
+    vocabulary. Implements the parts of the Hugging Face tokenizer API that
+    src/translation.py and src/preprocess.py use.
+    """
+
+    eos_token_id = 0
+    unk_token_id = 1
+
+    def __init__(self, vocab_size=8000, model_max_length=512):
+        self.vocab_size = vocab_size
+        self.pad_token_id = vocab_size - 1
+        self.model_max_length = model_max_length
+
+    def encode(self, text, truncation=False):
+        ids = [2 + zlib.crc32(word.encode("utf-8")) % (self.vocab_size - 3)
+               for word in re.findall(r"\w+|[^\w\s]", text)]
+        if truncation:
+            ids = ids[:self.model_max_length - 1]
+        return ids + [self.eos_token_id]
+
+    def __call__(self, texts, truncation=False, padding=False, return_tensors=None):
+        input_ids = [self.encode(text, truncation) for text in texts]
+        if return_tensors != "pt":
+            return {"input_ids": input_ids}
+
+        import torch
+        longest = max(len(ids) for ids in input_ids)
+        padded = [ids + [self.pad_token_id] * (longest - len(ids)) for ids in input_ids]
+        mask = [[1] * len(ids) + [0] * (longest - len(ids)) for ids in input_ids]
+        return {"input_ids": torch.tensor(padded), "attention_mask": torch.tensor(mask)}
+
+    def batch_decode(self, sequences, skip_special_tokens=True):
+        special = {self.eos_token_id, self.unk_token_id, self.pad_token_id}
+        return [" ".join(f"w{i}" for i in ids if not (skip_special_tokens and i in special))
+                for ids in sequences.tolist()]
+
+
+def tiny_marian(vocab_size=8000, max_new_tokens=48, seed=0):
+    """
+    (tokenizer, model) pair with a 1-layer, 64-dim randomly initialized
+    MarianMT model wrapped as a torch TranslationBackend. Output is
+    meaningless but costs scale with input like the real model's.
+    """
+    import torch
+    from transformers import MarianConfig, MarianMTModel
+    from src.backends import TorchBackend
+
+    tokenizer = StubTokenizer(vocab_size)
+    torch.manual_seed(seed)
+    config = MarianConfig(
+        vocab_size=vocab_size, d_model=64, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=128, decoder_ffn_dim=128,
+        max_position_embeddings=tokenizer.model_max_length, pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id, decoder_start_token_id=tokenizer.pad_token_id,
+        max_length=max_new_tokens, num_beams=1,
+    )
+    model = MarianMTModel(config)
+    model.eval()
+    return tokenizer, TorchBackend(model, TINY_MODEL_NAME)
+
+
+def make_synthetic_pdf(sample_pdf, pages, output_path):
+    """
+    Write a PDF of exactly `pages` pages by repeating the pages of `sample_pdf`.
+    """
+    import fitz
+    with fitz.open(sample_pdf) as sample, fitz.open() as doc:
+        while doc.page_count < pages:
+            last = min(sample.page_count, pages - doc.page_count) - 1
+            doc.insert_pdf(sample, from_page=0, to_page=last)
+        doc.save(output_path)
+    return output_path
@@ -0,0 +1,238 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src.model_registry import model_name_for
+from src.backends import default_backend
+
+DEFAULT_ARTIFACT_DIR = os.path.join(".cache", "artifacts")
+DEFAULT_MAX_MB = 1024
+# Eviction frees space down to this fraction of the limit, so it runs once per batch of puts
+LOW_WATER = 0.9
+
+
+def digest(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def prompt_version(build_prompt) -> str:
+    """
+    Hash of the prompt template, so editing the prompt invalidates
+    everything derived from Gemini output.
+    """
+    return digest(build_prompt("\x00"))[:16]
+
+
+def translation_version(direction, profile, glossary=None, backend=None) -> str:
+    """
+    Hash of everything that decides how a chunk is translated: direction,
+    model, backend, decoding profile name and glossary.
+    """
+    return digest(direction, model_name_for(direction), backend or default_backend(), profile,
+                  json.dumps(glossary, sort_keys=True, ensure_ascii=False))
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for pipeline artifacts (extracted pages, Gemini
+    output, chunk lists, translated chunks, finished PDFs).
+
+    Every entry is a directory named after a key that hashes everything the
+    artifact depends on (PDF bytes, direction, model and prompt versions,
+    options), holding one file per artifact name. Entries are evicted least
+    recently used first once the store grows beyond `max_bytes`.
+
+    Use order and sizes are kept in an in-memory index that is read from
+    disk (by entry mtime) once, when the store is opened. Entries written
+    by other processes afterwards are not counted against this process's
+    limit.
+    """
+
+    def __init__(self, root=DEFAULT_ARTIFACT_DIR, max_bytes=DEFAULT_MAX_MB * 2**20):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        # key -> size in bytes, least recently used first
+        self._index = OrderedDict()
+        for _, key, size in sorted(self._scan()):
+            self._index[key] = size
+        self._size = sum(self._index.values())
+        # Keys with a write in progress, never evicted
+        self._writing = {}
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _scan(self):
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if os.path.isdir(prefix_dir):
+                for key in os.listdir(prefix_dir):
+                    path = os.path.join(prefix_dir, key)
+                    yield os.path.getmtime(path), key, self._entry_size(path)
+
+    @staticmethod
+    def _entry_size(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+    def _count(self, counts, name, key=None):
+        with self._lock:
+            counts[name] = counts.get(name, 0) + 1
+            if key in self._index:
+                self._index.move_to_end(key)
+
+    def _begin_write(self, key):
+        with self._lock:
+            self._writing[key] = self._writing.get(key, 0) + 1
+            self._index.setdefault(key, 0)
+            self._index.move_to_end(key)
+        entry = self._entry_dir(key)
+        os.makedirs(entry, exist_ok=True)
+        return entry
+
+    def _end_write(self, key, added):
+        with self._lock:
+            self._writing[key] -= 1
+            if not self._writing[key]:
+                del self._writing[key]
+            self._index[key] = self._index.get(key, 0) + added
+            self._size += added
+        self._evict()
+
+    def get(self, key: str, name: str) -> Optional[bytes]:
+        path = os.path.join(self._entry_dir(key), name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._count(self.misses, name)
+            return None
+        # The entry directory's mtime orders the index when the store is reopened
+        try:
+            os.utime(self._entry_dir(key))
+        except FileNotFoundError:
+            pass
+        self._count(self.hits, name, key)
+        return data
+
+    def put(self, key: str, name: str, data: bytes):
+        entry = self._begin_write(key)
+        added = 0
+        try:
+            path = os.path.join(entry, name)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            added = len(data) - old_size
+        finally:
+            self._end_write(key, added)
+
+    def get_file(self, key: str, name: str, path) -> bool:
+        """
+        Copy an artifact to `path` without reading it into memory. Returns
+        False when it is not stored.
+        """
+        try:
+            shutil.copyfile(os.path.join(self._entry_dir(key), name), path)
+        except FileNotFoundError:
+            self._count(self.misses, name)
+            return False
+        try:
+            os.utime(self._entry_dir(key))
+        except FileNotFoundError:
+            pass
+        self._count(self.hits, name, key)
+        return True
+
+    def put_file(self, key: str, name: str, path):
+        entry = self._begin_write(key)
+        added = 0
+        try:
+            target = os.path.join(entry, name)
+            old_size = os.path.getsize(target) if os.path.exists(target) else 0
+            tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(path, tmp_path)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, target)
+            added = size - old_size
+        finally:
+            self._end_write(key, added)
+
+    def get_json(self, key: str, name: str):
+        data = self.get(key, name)
+        return None if data is None else json.loads(data.decode("utf-8"))
+
+    def put_json(self, key: str, name: str, value):
+        self.put(key, name, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def _evict(self):
+        with self._lock:
+            if self._size <= self.max_bytes:
+                return
+            target = self.max_bytes * LOW_WATER
+            for key in list(self._index):
+                if self._size <= target:
+                    break
+                if key in self._writing:
+                    continue
+                # Under the lock, so no write to this key can start meanwhile
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                self._size -= self._index.pop(key)
+
+    def size_bytes(self):
+        with self._lock:
+            return self._size
+
+    def stats(self):
+        """
+        Hits, misses and hit rate per artifact name since the process started.
+        """
+        with self._lock:
+            names = sorted(set(self.hits) | set(self.misses))
+            rows = {}
+            for name in names:
+                hits, misses = self.hits.get(name, 0), self.misses.get(name, 0)
+                rows[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+            return rows
+
+    def hit_rate(self):
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return hits / (hits + misses) if hits + misses else 0.0
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """
+    Shared store in ARTIFACT_CACHE_DIR (default .cache/artifacts), bounded by
+    ARTIFACT_CACHE_MB. An empty ARTIFACT_CACHE_DIR disables it (returns None).
+    """
+    global _default_store
+    root = os.getenv("ARTIFACT_CACHE_DIR", DEFAULT_ARTIFACT_DIR)
+    if not root:
+        return None
+    with _default_lock:
+        if _default_store is None:
+            max_mb = float(os.getenv("ARTIFACT_CACHE_MB", DEFAULT_MAX_MB))
+            _default_store = ArtifactStore(root, max_bytes=int(max_mb * 2**20))
+        return _default_store
@@ -0,0 +1,125 @@
+import os
+
+BACKENDS = ("torch", "int8", "onnx")
+DEFAULT_BACKEND = "torch"
+ONNX_EXPORT_DIR = os.path.join(".cache", "onnx")
+
+
+def default_backend():
+    backend = os.getenv("TRANSLATION_BACKEND", DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown TRANSLATION_BACKEND '{backend}', expected one of {', '.join(BACKENDS)}")
+    return backend
+
+
+class TranslationBackend:
+    """
+    Common interface the translation code talks to: `generate(**inputs)`
+    with tokenizer outputs, returning token ids for `tokenizer.batch_decode`.
+
+    `name_or_path` identifies model + backend, so translation memory entries
+    from a quantized model never answer for the full-precision one.
+    """
+
+    backend = "torch"
+
+    def __init__(self, model, model_name):
+        self.model = model
+        self.model_name = model_name
+
+    @property
+    def name_or_path(self):
+        if self.backend == DEFAULT_BACKEND:
+            return self.model_name
+        return f"{self.model_name}#{self.backend}"
+
+    def generate(self, **inputs):
+        return self.model.generate(**inputs)
+
+    def size_bytes(self):
+        params = sum(p.numel() * p.element_size() for p in self.model.parameters())
+        buffers = sum(b.numel() * b.element_size() for b in self.model.buffers())
+        return params + buffers
+
+
+class TorchBackend(TranslationBackend):
+    backend = "torch"
+
+    @classmethod
+    def load(cls, model_name):
+        from transformers import MarianMTModel
+        model = MarianMTModel.from_pretrained(model_name)
+        model.eval()
+        return cls(model, model_name)
+
+
+class Int8Backend(TranslationBackend):
+    """
+    PyTorch model with Linear layers dynamically quantized to int8.
+    """
+
+    backend = "int8"
+
+    @classmethod
+    def load(cls, model_name):
+        import torch
+        from transformers import MarianMTModel
+        model = MarianMTModel.from_pretrained(model_name)
+        model.eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return cls(model, model_name)
+
+    def size_bytes(self):
+        # Packed int8 weights are not reported through parameters(); they are
+        # unpacked one layer at a time, so measuring never copies the model
+        size = super().size_bytes()
+        for module in self.model.modules():
+            if hasattr(module, "_weight_bias"):
+                size += sum(t.numel() * t.element_size() for t in module._weight_bias() if t is not None)
+        return size
+
+
+class OnnxBackend(TranslationBackend):
+    """
+    ONNX Runtime encoder/decoder exported through optimum, decoding with
+    cached past key-values. The export is done once and kept under
+    .cache/onnx.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model, model_name, export_dir):
+        super().__init__(model, model_name)
+        self.export_dir = export_dir
+
+    @classmethod
+    def load(cls, model_name):
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError("The onnx backend needs optimum[onnxruntime]: pip install optimum[onnxruntime]") from e
+
+        export_dir = os.path.join(ONNX_EXPORT_DIR, model_name.replace("/", "__"))
+        if os.path.isdir(export_dir):
+            model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+        else:
+            model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+            model.save_pretrained(export_dir)
+        return cls(model, model_name, export_dir)
+
+    def size_bytes(self):
+        return sum(os.path.getsize(os.path.join(self.export_dir, f))
+                   for f in os.listdir(self.export_dir) if f.endswith(".onnx"))
+
+
+_BACKEND_CLASSES = {
+    "torch": TorchBackend,
+    "int8": Int8Backend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(model_name, backend=DEFAULT_BACKEND):
+    if backend not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    return _BACKEND_CLASSES[backend].load(model_name)
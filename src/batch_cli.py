@@ -0,0 +1,262 @@
+"""
+Headless batch translation of many PDFs.
+
+    python -m src.batch_cli "data/*.pdf" -o translated/ --jobs 4
+
+Each document gets a folder in the output directory holding its source
+chunks, one file per translated chunk and a manifest.json recording which
+chunks are finished and the settings they were made with. Re-running the
+same command after a crash skips finished documents and resumes
+unfinished ones from the last completed chunk; a document whose source or
+settings changed is started over.
+"""
+import os
+import sys
+import glob
+import json
+import hashlib
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.pdf_extract import extract_pages
+from src.extract_content import ask_gemini_to_process
+from src.preprocess import clean_text, split_into_chunks, split_into_token_chunks
+from src.model_registry import load_translation_model, load_tokenizer
+from src.translation import translate_texts, TranslationSession, DEFAULT_BATCH_SIZE
+from src.translation_memory import get_translation_memory
+from src.txt_to_pdf import render_pdf
+from src.backends import BACKENDS, default_backend
+from src.instrumentation import process_tracer
+from src.decoding import PROFILES, get_profile
+from src.placeholders import glossary_protector, load_glossary
+from src.layout_translate import translate_pdf_layout
+from src.artifact_store import digest, file_sha256
+from src.service_client import ServiceClient
+
+MANIFEST = "manifest.json"
+# Chunks translated between two manifest checkpoints
+CHECKPOINT_CHUNKS = 4
+
+
+def find_pdfs(source):
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*.pdf")
+    else:
+        pattern = source
+    return sorted(p for p in glob.glob(pattern, recursive=True) if p.lower().endswith(".pdf"))
+
+
+def document_dirs(pdfs, output_dir):
+    """
+    One output folder per PDF, named after the file; files sharing a name get
+    a short hash of their path appended.
+    """
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in pdfs]
+    dirs = {}
+    for pdf, stem in zip(pdfs, stems):
+        if stems.count(stem) > 1:
+            stem = f"{stem}-{hashlib.sha1(os.path.abspath(pdf).encode()).hexdigest()[:8]}"
+        dirs[pdf] = os.path.join(output_dir, stem)
+    return dirs
+
+
+def write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def write_text(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class DocumentJob:
+    def __init__(self, pdf_path, doc_dir, args):
+        self.pdf_path = pdf_path
+        self.doc_dir = doc_dir
+        self.args = args
+        self.manifest_path = os.path.join(doc_dir, MANIFEST)
+        self.chunks_dir = os.path.join(doc_dir, "chunks")
+        self.translated_dir = os.path.join(doc_dir, "translated")
+
+    def _settings(self, sha256):
+        """
+        Everything the stored chunks and translations depend on.
+        """
+        args = self.args
+        return {
+            "sha256": sha256,
+            "direction": args.direction,
+            "mode": args.mode,
+            "chunk_mode": args.chunk_mode,
+            "profile": get_profile(args.profile).name,
+            "backend": args.service.backend() if args.service is not None else args.backend or default_backend(),
+            "glossary": digest(json.dumps(glossary_protector(args.glossary).glossary, sort_keys=True,
+                                          ensure_ascii=False))[:16],
+        }
+
+    def _load_manifest(self, sha256):
+        settings = self._settings(sha256)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            changed = [name for name, value in settings.items() if manifest.get(name) != value]
+            if not changed:
+                return manifest
+            print(f"[{self.pdf_path}] {', '.join(changed)} changed, starting over")
+        return dict(settings, source=os.path.abspath(self.pdf_path), status="new", chunk_count=None, completed=[])
+
+    def _chunk(self, manifest):
+        pages = extract_pages(self.pdf_path)
+        text = clean_text(ask_gemini_to_process(pages))
+        if self.args.chunk_mode == "tokens":
+            chunks = split_into_token_chunks(text, load_tokenizer(self.args.direction),
+                                             protector=glossary_protector(self.args.glossary))
+        else:
+            chunks = split_into_chunks(text, max_words=800)
+
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        for idx, chunk in enumerate(chunks):
+            write_text(os.path.join(self.chunks_dir, f"chunk_{idx}.txt"), chunk)
+        manifest.update(status="chunked", chunk_count=len(chunks), completed=[])
+        write_json(self.manifest_path, manifest)
+
+    def _translate_group(self, texts, session):
+        if self.args.service is not None:
+            return self.args.service.translate(texts, self.args.direction, self.args.profile, self.args.glossary)
+        tokenizer, model = load_translation_model(self.args.direction, self.args.backend)
+        return translate_texts(texts, tokenizer, model, batch_size=self.args.batch_size,
+                               memory=get_translation_memory(), direction=self.args.direction,
+                               protector=glossary_protector(self.args.glossary), session=session,
+                               profile=self.args.profile)
+
+    def _translate(self, manifest):
+        session = TranslationSession()
+        completed = set(manifest["completed"])
+        pending = [i for i in range(manifest["chunk_count"]) if i not in completed]
+        os.makedirs(self.translated_dir, exist_ok=True)
+
+        for start in range(0, len(pending), CHECKPOINT_CHUNKS):
+            group = pending[start:start + CHECKPOINT_CHUNKS]
+            texts = [read_text(os.path.join(self.chunks_dir, f"chunk_{i}.txt")) for i in group]
+            translations = self._translate_group(texts, session)
+            for idx, translated in zip(group, translations):
+                write_text(os.path.join(self.translated_dir, f"chunk_{idx}.txt"), translated)
+            completed.update(group)
+            manifest.update(status="translating", completed=sorted(completed))
+            write_json(self.manifest_path, manifest)
+            print(f"[{self.pdf_path}] {len(completed)}/{manifest['chunk_count']} chunks translated")
+        if session.sentences:
+            print(f"[{self.pdf_path}] {session.saved} of {session.sentences} sentences needed no model call")
+
+    def _render(self, manifest):
+        stem = os.path.basename(self.doc_dir)
+
+        def lines():
+            yield "TRANSLATED DOCUMENT"
+            yield "=" * 60
+            yield ""
+            for idx in range(manifest["chunk_count"]):
+                yield f"Section: chunk_{idx}.txt"
+                yield "-" * 40
+                yield read_text(os.path.join(self.translated_dir, f"chunk_{idx}.txt"))
+                yield ""
+
+        with open(os.path.join(self.doc_dir, f"{stem}_translated.txt"), "w", encoding="utf-8") as f:
+            for line in lines():
+                f.write(line + "\n")
+        render_pdf(lines(), os.path.join(self.doc_dir, f"{stem}_translated.pdf"))
+        manifest.update(status="done")
+        write_json(self.manifest_path, manifest)
+
+    def _run_layout(self, manifest):
+        # Pages are rewritten in one pass; there are no chunk checkpoints to resume from
+        stem = os.path.basename(self.doc_dir)
+        result = translate_pdf_layout(self.pdf_path, os.path.join(self.doc_dir, f"{stem}_translated.pdf"),
+                                      self.args.direction, batch_size=self.args.batch_size,
+                                      glossary=self.args.glossary, profile=self.args.profile,
+                                      backend=self.args.backend, service=self.args.service)
+        manifest.update(status="done", blocks=result["blocks"])
+        write_json(self.manifest_path, manifest)
+        print(f"[{self.pdf_path}] done, {result['chunks']} of {result['blocks']} text blocks translated in place")
+        return manifest
+
+    def run(self):
+        os.makedirs(self.doc_dir, exist_ok=True)
+        manifest = self._load_manifest(file_sha256(self.pdf_path))
+        if manifest["status"] == "done":
+            print(f"[{self.pdf_path}] already done, skipping")
+            return manifest
+
+        if self.args.mode == "layout":
+            return self._run_layout(manifest)
+        if manifest["chunk_count"] is None:
+            self._chunk(manifest)
+        elif manifest["completed"]:
+            print(f"[{self.pdf_path}] resuming after {len(manifest['completed'])}/{manifest['chunk_count']} chunks")
+        self._translate(manifest)
+        self._render(manifest)
+        print(f"[{self.pdf_path}] done")
+        return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of PDFs (searched recursively) or a glob pattern")
+    parser.add_argument("-o", "--output-dir", default="translated")
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--jobs", type=int, default=2, help="Documents processed concurrently")
+    parser.add_argument("--mode", default="rebuild", choices=["rebuild", "layout"],
+                        help="rebuild: Gemini-structured text rendered to a new PDF; layout: translate over the original pages")
+    parser.add_argument("--chunk-mode", default="tokens", choices=["tokens", "words"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--backend", choices=BACKENDS, default=None)
+    parser.add_argument("--profile", choices=list(PROFILES), default=None,
+                        help="Decoding profile (default: DECODING_PROFILE or quality)")
+    parser.add_argument("--glossary", help="Terms to keep untranslated: text file (term or term = translation "
+                                           "per line) or JSON list/object, on top of GLOSSARY_PATH")
+    parser.add_argument("--trace", help="Write per-stage timings as JSON to this file")
+    parser.add_argument("--service-url", default=os.getenv("TRANSLATION_SERVICE_URL"),
+                        help="Translate through the service in src/service.py (default: TRANSLATION_SERVICE_URL)")
+    args = parser.parse_args(argv)
+    args.service = ServiceClient(args.service_url) if args.service_url else None
+    args.glossary = load_glossary(args.glossary) if args.glossary else None
+
+    pdfs = find_pdfs(args.source)
+    if not pdfs:
+        print(f"No PDF files found for '{args.source}'")
+        return 1
+    print(f"Found {len(pdfs)} PDF files")
+
+    dirs = document_dirs(pdfs, args.output_dir)
+    failed = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(DocumentJob(pdf, dirs[pdf], args).run): pdf for pdf in pdfs}
+        for future in as_completed(futures):
+            pdf = futures[future]
+            try:
+                future.result()
+            except Exception:
+                failed.append(pdf)
+                print(f"[{pdf}] failed:\n{traceback.format_exc()}")
+
+    print(f"{len(pdfs) - len(failed)} of {len(pdfs)} documents translated into '{args.output_dir}'")
+    for row in process_tracer.summary():
+        print("  " + ", ".join(f"{key}={value}" for key, value in row.items()))
+    if args.trace:
+        process_tracer.to_json(args.trace)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
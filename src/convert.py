@@ -1,54 +1,87 @@
-import os
-import re
-from transformers import MarianMTModel, MarianTokenizer
-import nltk
-from nltk.tokenize import sent_tokenize
-
-nltk.download("punkt")
-
-def load_translation_model(direction="en_to_hi"):
-    model_name = "Helsinki-NLP/opus-mt-en-hi" if direction == "en_to_hi" else "Helsinki-NLP/opus-mt-hi-en"
-    tokenizer = MarianTokenizer.from_pretrained(model_name)
-    model = MarianMTModel.from_pretrained(model_name)
-    return tokenizer, model
+"""
+Translate a folder of text chunks into one text file.
 
-def intelligent_translate(text, tokenizer, model):
-    preserved = re.findall(r'\b[A-Z]{2,}\b', text)
-    for word in preserved:
-        text = text.replace(word, f"[{word}]")
-    
-    sentences = sent_tokenize(text)
-    translated_sentences = []
-    for sentence in sentences:
-        inputs = tokenizer(sentence, return_tensors="pt", truncation=True, padding=True)
-        outputs = model.generate(**inputs)
-        translated = tokenizer.decode(outputs[0], skip_special_tokens=True)
-        for word in preserved:
-            translated = translated.replace(f"[{word}]", word)
-        translated_sentences.append(translated)
-    
-    return "\n".join(translated_sentences)
+    python -m src.convert --input-folder chunks --output-file translated_output.txt
+"""
+import os
+import argparse
+from src.model_registry import load_translation_model
+from src.translation_memory import get_translation_memory
+from src.parallel_translate import translate_texts_parallel
+from src.backends import BACKENDS
+from src.placeholders import glossary_protector, load_glossary
+from src.decoding import PROFILES
+from src.service_client import get_service_client
+from src.translation import translate_texts, TranslationSession, DEFAULT_BATCH_SIZE, DEFAULT_MAX_TOKENS
 
-def translate_chunks_to_text(input_folder="chunks", output_file="translated_output.txt", direction="en_to_hi"):
+def translate_chunks_to_text(input_folder="chunks", output_file="translated_output.txt", direction="en_to_hi",
+                             batch_size=DEFAULT_BATCH_SIZE, max_tokens=DEFAULT_MAX_TOKENS, workers=1,
+                             backend=None, glossary=None, profile=None):
     """
-    Save as text file instead of PDF to avoid encoding issues
+    Save as text file instead of PDF to avoid encoding issues.
+    With workers > 1 chunks are spread over that many model processes.
+    `glossary` lists terms to keep (or map) in addition to acronyms.
+    `profile` names a decoding profile from src/decoding.py.
+    With TRANSLATION_SERVICE_URL set, the translation service does the work.
     """
-    tokenizer, model = load_translation_model(direction)
-    
+    filenames = [f for f in sorted(os.listdir(input_folder)) if f.endswith(".txt")]
+    texts = []
+    for filename in filenames:
+        with open(os.path.join(input_folder, filename), "r", encoding="utf-8") as f:
+            texts.append(f.read())
+
+    memory = None
+    session = None
+    service = get_service_client()
+    if service is not None:
+        translations = service.translate(texts, direction, profile, glossary)
+    elif workers > 1:
+        translations = translate_texts_parallel(texts, direction, workers, batch_size=batch_size, max_tokens=max_tokens,
+                                                backend=backend, glossary=glossary, profile=profile)
+    else:
+        memory = get_translation_memory()
+        session = TranslationSession()
+        tokenizer, model = load_translation_model(direction, backend)
+        translations = translate_texts(texts, tokenizer, model, batch_size=batch_size, max_tokens=max_tokens,
+                                       memory=memory, direction=direction,
+                                       protector=glossary_protector(glossary), session=session,
+                                       profile=profile)
+
     with open(output_file, "w", encoding="utf-8") as output:
-        for filename in sorted(os.listdir(input_folder)):
-            if filename.endswith(".txt"):
-                with open(os.path.join(input_folder, filename), "r", encoding="utf-8") as f:
-                    text = f.read()
-                    translated = intelligent_translate(text, tokenizer, model)
-                    
-                    output.write(f"\n{'='*50}\n")
-                    output.write(f"File: {filename}\n")
-                    output.write(f"{'='*50}\n\n")
-                    output.write(translated)
-                    output.write("\n\n")
+        for filename, translated in zip(filenames, translations):
+            output.write(f"\n{'='*50}\n")
+            output.write(f"File: {filename}\n")
+            output.write(f"{'='*50}\n\n")
+            output.write(translated)
+            output.write("\n\n")
     
     print(f"Translated text file created : {output_file}")
+    if memory is not None:
+        print(f"Translation memory: {memory.hits} hits, {memory.misses} misses")
+    if session is not None:
+        print(f"Sentences: {session.sentences}, duplicates: {session.duplicates}, passed through: "
+              f"{session.passthrough}, sent to the model: {session.translated} ({session.saved} model calls saved)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate text chunks with MarianMT")
+    parser.add_argument("--input-folder", default="chunks")
+    parser.add_argument("--output-file", default="translated_output.txt")
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Max sentences per generate() call")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="Max padded tokens per batch")
+    parser.add_argument("--workers", type=int, default=1, help="Model processes; torch threads are split evenly between them")
+    parser.add_argument("--backend", choices=BACKENDS, default=None,
+                        help="Inference backend (default: TRANSLATION_BACKEND or torch)")
+    parser.add_argument("--glossary", help="Terms to keep untranslated: text file (term or term = translation "
+                                           "per line) or JSON list/object, on top of GLOSSARY_PATH")
+    parser.add_argument("--profile", choices=list(PROFILES), default=None,
+                        help="Decoding profile: fast (greedy), balanced or quality (default: DECODING_PROFILE or quality)")
+    args = parser.parse_args()
+
+    translate_chunks_to_text(args.input_folder, args.output_file, args.direction,
+                             batch_size=args.batch_size, max_tokens=args.max_tokens, workers=args.workers,
+                             backend=args.backend, glossary=load_glossary(args.glossary) if args.glossary else None,
+                             profile=args.profile)
 
 if __name__ == "__main__":
-    translate_chunks_to_text()
\ No newline at end of file
+    main()
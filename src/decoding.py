@@ -0,0 +1,56 @@
+import os
+
+DEFAULT_PROFILE = "quality"
+
+
+class DecodingProfile:
+    """
+    Settings for `model.generate`. The output budget is
+    `length_ratio * longest input + extra_tokens` new tokens, so a sentence
+    that starts repeating itself stops there instead of running to the
+    model's max_length (512).
+    """
+
+    def __init__(self, name, num_beams, length_ratio, extra_tokens, description):
+        self.name = name
+        self.num_beams = num_beams
+        self.length_ratio = length_ratio
+        self.extra_tokens = extra_tokens
+        self.description = description
+
+    def max_new_tokens(self, input_length):
+        return int(input_length * self.length_ratio) + self.extra_tokens
+
+    def generate_kwargs(self, input_length):
+        kwargs = {
+            "num_beams": self.num_beams,
+            "max_new_tokens": self.max_new_tokens(input_length),
+            "use_cache": True,
+        }
+        if self.num_beams > 1:
+            # Stop once num_beams finished candidates exist
+            kwargs["early_stopping"] = True
+        return kwargs
+
+
+PROFILES = {
+    "fast": DecodingProfile("fast", num_beams=1, length_ratio=1.5, extra_tokens=8,
+                            description="Greedy decoding, for bulk jobs"),
+    "balanced": DecodingProfile("balanced", num_beams=2, length_ratio=2.0, extra_tokens=12,
+                                description="Two beams"),
+    "quality": DecodingProfile("quality", num_beams=4, length_ratio=2.5, extra_tokens=16,
+                               description="Four beams, as the Marian models are configured"),
+}
+
+
+def get_profile(profile=None):
+    """
+    Resolve a profile name (or None for DECODING_PROFILE, default "quality").
+    DecodingProfile instances are returned as they are.
+    """
+    if isinstance(profile, DecodingProfile):
+        return profile
+    name = profile or os.getenv("DECODING_PROFILE", DEFAULT_PROFILE)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown decoding profile '{name}', expected one of {', '.join(PROFILES)}")
+    return PROFILES[name]
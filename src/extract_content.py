@@ -1,20 +1,16 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))  
-
-def read_pdf_text(path):
-    import fitz  
-    doc = fitz.open(path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
-
-def ask_gemini_to_process(text):
-    prompt = f"""This PDF contains structured text with headings, paragraphs, and visuals such as flowcharts, tables, and charts.\n\n"
+"""
+Structure the text of a PDF with Gemini and save it to output.txt.
+
+    python -m src.extract_content
+"""
+from src.pdf_extract import extract_text, extract_pages
+from src.gemini_structuring import structure_pages, default_cache, DEFAULT_CONCURRENCY
+
+def read_pdf_text(path, workers=None):
+    return extract_text(path, workers)
+
+def build_prompt(text):
+    return f"""This PDF contains structured text with headings, paragraphs, and visuals such as flowcharts, tables, and charts.\n\n"
         "Your task is to:\n"
         "1. Extract the **entire written content exactly as it appears**, preserving all **headings, subheadings, and structure**.\n"
         "2. Do NOT summarize, rephrase, or omit any part of the text.\n"
@@ -35,11 +31,26 @@ def ask_gemini_to_process(text):
         "6. Keep output clean and simple - good for embeddings and chunking\n"
         "7. No special markers, no extra formatting - just natural readable text\n\n"
         f"Content:\n{text}"""
-    
 
-    model = genai.GenerativeModel(model_name="gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    return response.text
+
+# Marks an omitted `cache` argument, since None turns caching off
+_DEFAULT_CACHE = object()
+
+
+def ask_gemini_to_process(text, client=None, concurrency=DEFAULT_CONCURRENCY, cache=_DEFAULT_CACHE):
+    """
+    Structure the document with Gemini.
+
+    `text` is either the full text or a list of page texts. Pages are grouped
+    into windows that are sent concurrently and reassembled in order;
+    responses are cached on disk (default: default_cache(); None disables
+    the cache) so re-uploads skip the LLM.
+    """
+    pages = [text] if isinstance(text, str) else list(text)
+    if cache is _DEFAULT_CACHE:
+        cache = default_cache()
+    outputs = structure_pages(pages, build_prompt, client=client, concurrency=concurrency, cache=cache)
+    return "\n\n".join(outputs)
 
 def save_to_txt(text, filename="output.txt"):
     with open(filename, "w", encoding="utf-8") as f:
@@ -48,9 +59,9 @@ def save_to_txt(text, filename="output.txt"):
 def main():
     pdf_path = "data/398b3383-67bd-43ee-8e90-6c3b331c13a2.pdf"
     print("Reading PDF content...")
-    text = read_pdf_text(pdf_path)
+    pages = extract_pages(pdf_path)
     print("Processing with Gemini 2.0 Flash...")
-    output = ask_gemini_to_process(text)
+    output = ask_gemini_to_process(pages)
     save_to_txt(output)
     print("Saved output to output.txt")
 
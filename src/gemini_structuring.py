@@ -0,0 +1,184 @@
+import os
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from src.instrumentation import span
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+DEFAULT_WINDOW_PAGES = 8
+DEFAULT_WINDOW_CHARS = 30000
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 1.0
+DEFAULT_CACHE_DIR = os.path.join(".cache", "gemini")
+
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def configure_genai():
+    """
+    Import and configure google.generativeai with GOOGLE_API_KEY (read from
+    .env too) on first use, once per process, and return the module.
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            from dotenv import load_dotenv
+            load_dotenv()
+            genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+            _genai = genai
+        return _genai
+
+
+class GeminiClient:
+    """
+    Thin async wrapper around google.generativeai. Anything with a
+    `model_name` attribute and an async `generate(prompt) -> str` method can
+    be used in its place (e.g. a local stub in benchmarks).
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    async def generate(self, prompt: str) -> str:
+        if self._model is None:
+            self._model = configure_genai().GenerativeModel(model_name=self.model_name)
+        response = await self._model.generate_content_async(prompt)
+        return response.text
+
+
+class ResponseCache:
+    """
+    On-disk cache of LLM responses, one file per sha256(model name + prompt).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".txt")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            self.hits += 1
+            return f.read()
+
+    def put(self, key: str, value: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+
+
+def _split_long_page(page, window_chars):
+    pieces = []
+    piece = ""
+    for line in page.splitlines(keepends=True):
+        if piece and len(piece) + len(line) > window_chars:
+            pieces.append(piece)
+            piece = ""
+        piece += line
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+
+def iter_windows(pages: Iterable[str], window_pages=DEFAULT_WINDOW_PAGES, window_chars=DEFAULT_WINDOW_CHARS) -> Iterator[str]:
+    """
+    Group consecutive pages into windows of at most `window_pages` pages and
+    roughly `window_chars` characters. A single page longer than the limit is
+    split at line boundaries. Windows are yielded as soon as they are full.
+    """
+    current = []
+    current_chars = 0
+
+    for page in pages:
+        pieces = _split_long_page(page, window_chars) if len(page) > window_chars else [page]
+        for piece in pieces:
+            if current and (len(current) >= window_pages or current_chars + len(piece) > window_chars):
+                yield "".join(current)
+                current = []
+                current_chars = 0
+            current.append(piece)
+            current_chars += len(piece)
+        if len(pieces) > 1:
+            yield "".join(current)
+            current = []
+            current_chars = 0
+
+    if current:
+        yield "".join(current)
+
+
+def make_windows(pages: Sequence[str], window_pages=DEFAULT_WINDOW_PAGES, window_chars=DEFAULT_WINDOW_CHARS) -> List[str]:
+    return list(iter_windows(pages, window_pages, window_chars))
+
+
+async def structure_window_async(prompt, client, cache, semaphore, retries, backoff):
+    key = cache.make_key(client.model_name, prompt) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    async with semaphore:
+        for attempt in range(retries + 1):
+            try:
+                with span("structure.request", chars=len(prompt)):
+                    result = await client.generate(prompt)
+                break
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                delay = backoff * (2 ** attempt) * (1 + random.random() / 2)
+                print(f"Gemini request failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+async def structure_windows_async(windows: Sequence[str], build_prompt: Callable[[str], str], client=None,
+                                  concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES,
+                                  backoff=DEFAULT_BACKOFF, cache=None) -> List[str]:
+    client = client or GeminiClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [structure_window_async(build_prompt(window), client, cache, semaphore, retries, backoff) for window in windows]
+    # gather keeps results in window order regardless of completion order
+    return await asyncio.gather(*tasks)
+
+
+def structure_pages(pages: Sequence[str], build_prompt: Callable[[str], str], client=None,
+                    window_pages=DEFAULT_WINDOW_PAGES, window_chars=DEFAULT_WINDOW_CHARS,
+                    concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                    cache=None) -> List[str]:
+    windows = make_windows(pages, window_pages, window_chars)
+    with span("structure", windows=len(windows)):
+        return asyncio.run(structure_windows_async(windows, build_prompt, client, concurrency, retries, backoff, cache))
+
+
+def default_cache():
+    """
+    Cache in GEMINI_CACHE_DIR (default .cache/gemini); an empty value disables it.
+    """
+    cache_dir = os.getenv("GEMINI_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return ResponseCache(cache_dir) if cache_dir else None
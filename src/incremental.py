@@ -0,0 +1,227 @@
+"""
+Incremental re-translation of a revised document.
+
+Every pipeline run can write its sentence-aligned (source, translation)
+pairs as JSON Lines, after a header line naming the direction, model,
+decoding profile and glossary they were translated with. A previous
+version translated with other settings is rejected. Given the pairs of the
+previous version, the new
+document's sentences are diffed against the old ones and only inserted or
+changed sentences are translated; everything else is reused.
+
+    python -m src.incremental sop_v2.pdf sop_v2_translated.pdf --previous sop_v1_translated_alignment.jsonl
+"""
+import os
+import json
+import argparse
+from difflib import SequenceMatcher
+from typing import Callable, Iterable, List, Sequence, Tuple
+
+from src.translation import split_sentences, normalize_sentence
+from src.model_registry import model_name_for
+from src.artifact_store import digest
+from src.placeholders import glossary_protector
+
+Pair = Tuple[str, str]
+
+
+class Alignment(list):
+    """
+    Sentence pairs, with the header of the run that wrote them (None for
+    files without one).
+    """
+
+    def __init__(self, pairs=(), header=None):
+        super().__init__(pairs)
+        self.header = header
+
+
+def alignment_header(direction, profile, glossary=None) -> dict:
+    # The glossary the translation applies: `glossary` merged over GLOSSARY_PATH
+    applied = glossary_protector(glossary).glossary
+    return {"direction": direction, "model": model_name_for(direction), "profile": profile,
+            "glossary": digest(json.dumps(applied, sort_keys=True, ensure_ascii=False))[:16]}
+
+
+def check_alignment(previous, header):
+    """
+    Raise ValueError when `previous` was translated with settings other
+    than `header`; its translations would not match a fresh run.
+    """
+    written = getattr(previous, "header", None)
+    if written is None:
+        return
+    changed = [name for name, value in header.items() if written.get(name) != value]
+    if changed:
+        raise ValueError(f"The previous alignment was translated with a different {', '.join(changed)}; "
+                         "translate this version without it")
+
+
+def align_chunk(source: str, translated: str) -> List[Pair]:
+    """
+    Sentence pairs of a chunk translated by translate_texts, which joins
+    sentence translations with newlines. If the counts disagree the chunk
+    is kept as a single pair.
+    """
+    sentences = [normalize_sentence(sentence) for sentence in split_sentences(source)]
+    translations = translated.split("\n")
+    if len(sentences) != len(translations):
+        return [(normalize_sentence(source), " ".join(translations))]
+    return list(zip(sentences, translations))
+
+
+class AlignmentWriter:
+    """
+    Appends pairs to a JSON Lines file as they are produced.
+    """
+
+    def __init__(self, path, header=None):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        if header is not None:
+            self._file.write(json.dumps({"header": header}, ensure_ascii=False) + "\n")
+
+    def write(self, pairs: Iterable[Pair]):
+        for source, translation in pairs:
+            self._file.write(json.dumps({"source": source, "translation": translation}, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def parse_alignment(text: str) -> Alignment:
+    """
+    Pairs from JSON Lines ({"source", "translation"} per line, optionally
+    after a {"header"} line) or a JSON list of [source, translation].
+    """
+    text = text.strip()
+    if text.startswith("["):
+        return Alignment((source, translation) for source, translation in json.loads(text))
+    alignment = Alignment()
+    for line in text.splitlines():
+        if line.strip():
+            item = json.loads(line)
+            if "header" in item:
+                alignment.header = item["header"]
+                continue
+            alignment.append((item["source"], item["translation"]))
+    return alignment
+
+
+def load_alignment(path) -> Alignment:
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_alignment(f.read())
+
+
+def diff_sentences(previous: Sequence[Pair], sentences: Sequence[str]):
+    """
+    Match `sentences` against the sources of `previous`.
+
+    Returns the reused translation (or None) per sentence and counts of
+    unchanged, moved, changed, inserted and removed sentences. A common
+    prefix and suffix are matched directly, so a revision that touches a
+    few paragraphs only runs SequenceMatcher over the region in between.
+    Sentences that left the aligned region but still occur elsewhere in the
+    old version count as moved and are reused too.
+    """
+    old = [source for source, _ in previous]
+    reused = [None] * len(sentences)
+    counts = {"unchanged": 0, "moved": 0, "changed": 0, "inserted": 0, "removed": 0}
+
+    prefix = 0
+    while prefix < min(len(old), len(sentences)) and old[prefix] == sentences[prefix]:
+        reused[prefix] = previous[prefix][1]
+        prefix += 1
+    suffix = 0
+    while (suffix < min(len(old), len(sentences)) - prefix
+           and old[len(old) - 1 - suffix] == sentences[len(sentences) - 1 - suffix]):
+        reused[len(sentences) - 1 - suffix] = previous[len(old) - 1 - suffix][1]
+        suffix += 1
+    counts["unchanged"] = prefix + suffix
+
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = sentences[prefix:len(sentences) - suffix]
+    kinds = {}
+    matcher = SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for k in range(j2 - j1):
+                reused[prefix + j1 + k] = previous[prefix + i1 + k][1]
+            counts["unchanged"] += j2 - j1
+            continue
+        if tag in ("replace", "delete"):
+            counts["removed"] += i2 - i1
+        for j in range(j1, j2):
+            kinds[prefix + j] = "changed" if tag == "replace" else "inserted"
+
+    known = dict(previous)
+    for index, kind in kinds.items():
+        if sentences[index] in known:
+            reused[index] = known[sentences[index]]
+            kind = "moved"
+        counts[kind] += 1
+    return reused, counts
+
+
+class IncrementalTranslator:
+    """
+    Translates the chunks of a revised document against the sentence pairs
+    of its previous version. `translate` receives the sentences that need
+    the model and returns their translations.
+    """
+
+    def __init__(self, previous: Sequence[Pair]):
+        self.previous = list(previous)
+
+    def translate(self, chunks: Sequence[str], translate: Callable[[List[str]], List[str]]):
+        """
+        Returns the chunk translations, the new document's sentence pairs and
+        a report of what was reused and what was translated.
+        """
+        bounds = []
+        sentences = []
+        for chunk in chunks:
+            start = len(sentences)
+            sentences.extend(normalize_sentence(sentence) for sentence in split_sentences(chunk))
+            bounds.append((start, len(sentences)))
+
+        reused, counts = diff_sentences(self.previous, sentences)
+        missing = [i for i, translation in enumerate(reused) if translation is None]
+        # One line per sentence keeps the output aligned for the next revision
+        translated = [" ".join(t.split("\n")) for t in translate([sentences[i] for i in missing])] if missing else []
+        results = list(reused)
+        for i, translation in zip(missing, translated):
+            results[i] = translation
+
+        report = dict(counts, sentences=len(sentences), reused=len(sentences) - len(missing),
+                      translated=len(missing))
+        pairs = list(zip(sentences, results))
+        return ["\n".join(results[start:end]) for start, end in bounds], pairs, report
+
+
+def main():
+    from src.pipeline import run_pipeline
+    from src.decoding import PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--previous", help="Alignment file of the previous version (omit for the first version)")
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--profile", choices=list(PROFILES), default=None)
+    args = parser.parse_args()
+
+    alignment_path = os.path.splitext(args.output)[0] + "_alignment.jsonl"
+    result = run_pipeline(args.input, args.output, args.direction, profile=args.profile,
+                          previous_alignment=load_alignment(args.previous) if args.previous else None,
+                          alignment_path=alignment_path)
+    report = result.get("incremental")
+    if report:
+        print(f"{report['translated']} of {report['sentences']} sentences translated: {report['changed']} changed, "
+              f"{report['inserted']} inserted; {report['unchanged']} unchanged and {report['moved']} moved "
+              f"sentences reused, {report['removed']} removed")
+    print(f"Translated PDF: {args.output}, alignment for the next revision: {alignment_path}")
+
+
+if __name__ == "__main__":
+    main()
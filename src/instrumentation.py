@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Spans kept per tracer for to_json; stage totals cover every span
+MAX_SPANS = 10000
+
+
+def peak_rss_bytes():
+    """
+    Highest resident set size of this process so far.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return 0
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+
+class Span:
+    """
+    Time spent blocked on another stage is added to `waited`; it is left out
+    of `duration` and recorded as a separate `<name>.queue_wait` span.
+    """
+
+    def __init__(self, name, items):
+        self.name = name
+        self.items = dict(items)
+        self.start = time.time()
+        self.duration = 0.0
+        self.waited = 0.0
+        self.peak_rss = 0
+
+    def add(self, unit, count=1):
+        self.items[unit] = self.items.get(unit, 0) + count
+
+
+class Tracer:
+    """
+    Collects spans and per-stage totals (calls, wall time, items processed,
+    peak RSS). Spans recorded on a tracer with a `parent` are also recorded
+    on the parent, so per-job tracers feed the process-wide one. Only the
+    last `max_spans` spans are kept, so a long-running process does not
+    grow without bound.
+    """
+
+    def __init__(self, parent=None, max_spans=MAX_SPANS):
+        self.parent = parent
+        self.spans = deque(maxlen=max_spans)
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **items):
+        span = Span(name, items)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - started - span.waited
+            span.peak_rss = peak_rss_bytes()
+            self._record(span)
+            if span.waited:
+                wait = Span(f"{name}.queue_wait", {})
+                wait.start, wait.duration, wait.peak_rss = span.start, span.waited, span.peak_rss
+                self._record(wait)
+
+    def _record(self, span):
+        with self._lock:
+            self.spans.append(span)
+            stage = self.stages.setdefault(span.name, {"calls": 0, "seconds": 0.0, "items": {}, "peak_rss": 0})
+            stage["calls"] += 1
+            stage["seconds"] += span.duration
+            stage["peak_rss"] = max(stage["peak_rss"], span.peak_rss)
+            for unit, count in span.items.items():
+                stage["items"][unit] = stage["items"].get(unit, 0) + count
+        if self.parent is not None:
+            self.parent._record(span)
+
+    def summary(self):
+        """
+        One row per stage with totals and throughput (items per second).
+        """
+        with self._lock:
+            rows = []
+            for name, stage in self.stages.items():
+                row = {"stage": name, "calls": stage["calls"], "seconds": round(stage["seconds"], 3)}
+                for unit, count in stage["items"].items():
+                    row[unit] = count
+                    if stage["seconds"] > 0:
+                        row[f"{unit}/sec"] = round(count / stage["seconds"], 2)
+                row["peak_rss_mb"] = round(stage["peak_rss"] / 2**20, 1)
+                rows.append(row)
+            return rows
+
+    def to_json(self, path):
+        with self._lock:
+            spans = [{"name": s.name, "start": s.start, "seconds": round(s.duration, 6),
+                      "items": s.items, "peak_rss_bytes": s.peak_rss} for s in self.spans]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"spans": spans, "stages": self.summary()}, f, indent=2)
+
+    def to_prometheus(self):
+        lines = [
+            "# HELP translator_stage_seconds_total Wall time spent in each pipeline stage",
+            "# TYPE translator_stage_seconds_total counter",
+        ]
+        with self._lock:
+            stages = {name: dict(stage, items=dict(stage["items"])) for name, stage in self.stages.items()}
+        for name, stage in stages.items():
+            lines.append(f'translator_stage_seconds_total{{stage="{name}"}} {stage["seconds"]:.6f}')
+        lines += ["# HELP translator_stage_calls_total Spans recorded per stage",
+                  "# TYPE translator_stage_calls_total counter"]
+        for name, stage in stages.items():
+            lines.append(f'translator_stage_calls_total{{stage="{name}"}} {stage["calls"]}')
+        lines += ["# HELP translator_stage_items_total Items processed per stage and unit",
+                  "# TYPE translator_stage_items_total counter"]
+        for name, stage in stages.items():
+            for unit, count in stage["items"].items():
+                lines.append(f'translator_stage_items_total{{stage="{name}",unit="{unit}"}} {count}')
+        lines += ["# HELP translator_stage_peak_rss_bytes Process peak RSS observed at the end of a stage",
+                  "# TYPE translator_stage_peak_rss_bytes gauge"]
+        for name, stage in stages.items():
+            lines.append(f'translator_stage_peak_rss_bytes{{stage="{name}"}} {stage["peak_rss"]}')
+        return "\n".join(lines) + "\n"
+
+
+process_tracer = Tracer()
+_current = contextvars.ContextVar("tracer", default=process_tracer)
+
+
+def current_tracer():
+    return _current.get()
+
+
+@contextmanager
+def use_tracer(tracer):
+    token = _current.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current.reset(token)
+
+
+def span(name, **items):
+    return current_tracer().span(name, **items)
+
+
+def timed(name):
+    """
+    Decorator recording every call of the function as a span.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = process_tracer.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_metrics_server = None
+_metrics_lock = threading.Lock()
+
+
+def serve_metrics(port):
+    """
+    Serve the process-wide stage metrics in Prometheus text format on
+    http://0.0.0.0:<port>/ from a daemon thread. Safe to call repeatedly.
+    """
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+        return _metrics_server
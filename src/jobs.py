@@ -0,0 +1,247 @@
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.pdf_extract import page_count
+from src.pipeline import TranslationPipeline
+from src.layout_translate import translate_pdf_layout
+from src.instrumentation import Tracer, process_tracer, use_tracer
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Output modes: rebuild the document from Gemini-structured text, or write
+# the translation over the original pages
+REBUILD = "rebuild"
+LAYOUT = "layout"
+# Pipeline options that also apply to layout mode
+LAYOUT_OPTIONS = ("batch_size", "glossary", "profile")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    """
+    One translation request with its own workspace directory. Status fields
+    are written by the worker thread and read by the UI through `snapshot()`.
+    """
+
+    def __init__(self, filename, direction, workspace, mode=REBUILD):
+        self.id = uuid.uuid4().hex[:12]
+        self.filename = filename
+        self.direction = direction
+        self.mode = mode
+        self.workspace = workspace
+        self.input_path = os.path.join(workspace, "input.pdf")
+        self.output_path = os.path.join(workspace, "translated.pdf")
+        self.trace_path = os.path.join(workspace, "trace.json")
+        # Sentence pairs a later revision of the document can be diffed against
+        self.alignment_path = os.path.join(workspace, "alignment.jsonl")
+        # Copies of the outputs in the static directory, see JobManager.publish
+        self.published = []
+        self.future = None
+        self.tracer = Tracer(parent=process_tracer)
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Waiting for a free worker..."
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for key, value in fields.items():
+                setattr(self, key, value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "filename": self.filename,
+                "status": self.status,
+                "progress": self.progress,
+                "message": self.message,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """
+    Runs translation jobs on a bounded pool of worker threads.
+
+    Every job gets an isolated temp workspace, so concurrent users never
+    share input or output files. At most `max_queued` jobs may wait for a
+    worker; further submissions raise QueueFullError. Finished jobs and their
+    workspaces are removed `ttl_seconds` after completion.
+
+    Outputs can be published into `static_dir` (Streamlit's static folder),
+    so the browser fetches them from disk instead of the page embedding them.
+    """
+
+    def __init__(self, max_workers=2, max_queued=16, ttl_seconds=3600, root=None, pipeline_options=None,
+                 static_dir=None):
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self.root = root or os.path.join(tempfile.gettempdir(), "pdf_translator_jobs")
+        self.static_dir = static_dir
+        self.pipeline_options = pipeline_options or {}
+        os.makedirs(self.root, exist_ok=True)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    def submit(self, pdf_bytes, filename, direction="en_to_hi", mode=REBUILD, **pipeline_options):
+        self.purge_expired()
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            if queued >= self.max_queued:
+                raise QueueFullError(f"{queued} jobs are already waiting, try again shortly")
+
+            workspace = tempfile.mkdtemp(prefix="job_", dir=self.root)
+            job = Job(filename, direction, workspace, mode)
+            self._jobs[job.id] = job
+
+        with open(job.input_path, "wb") as f:
+            f.write(pdf_bytes)
+        job.future = self._pool.submit(self._run, job, {**self.pipeline_options, **pipeline_options})
+        return job
+
+    def get(self, job_id):
+        # Polled by every open page, so expired jobs go even without new submissions
+        self.purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def remove(self, job_id):
+        """
+        Forget a job. A queued job is cancelled; a running one finishes and
+        its workspace is discarded then.
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return None
+        if job.status in (DONE, FAILED) or (job.future is not None and job.future.cancel()):
+            self._discard(job)
+        return job
+
+    def publish(self, job, path):
+        """
+        Link `path` into the static directory under a name derived from the
+        job id and return that name (served by Streamlit at app/static/<name>).
+        """
+        name = job.id + os.path.splitext(path)[1]
+        target = os.path.join(self.static_dir, name)
+        if target not in job.published:
+            os.makedirs(self.static_dir, exist_ok=True)
+            try:
+                os.link(path, target)
+            except FileExistsError:
+                pass
+            except OSError:
+                # Different filesystem or no hard link support
+                shutil.copyfile(path, target)
+            job.published.append(target)
+        return name
+
+    def _discard(self, job):
+        shutil.rmtree(job.workspace, ignore_errors=True)
+        for path in job.published:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished is not None and now - job.finished > self.ttl_seconds]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            self._discard(job)
+        return len(expired)
+
+    def _run(self, job, pipeline_options):
+        if self.get(job.id) is None:
+            # Removed after it started waiting but too late to cancel
+            self._discard(job)
+            return
+        with use_tracer(job.tracer):
+            self._run_job(job, pipeline_options)
+
+    def _run_job(self, job, pipeline_options):
+        job.update(status=RUNNING)
+        outcome = {"status": FAILED, "message": "Translation failed"}
+        try:
+            if job.mode == LAYOUT:
+                result = self._run_layout(job, pipeline_options)
+            else:
+                result = self._run_pipeline(job, pipeline_options)
+            outcome = {"status": DONE, "progress": 1.0, "message": "✅ Translation completed!", "result": result}
+        except Exception as e:
+            outcome["error"] = str(e)
+        finally:
+            # Done with the workspace before the job looks finished: remove() discards
+            # the workspace of a finished job at once
+            job.tracer.to_json(job.trace_path)
+            # The uploaded PDF is no longer needed once the job has run
+            if os.path.exists(job.input_path):
+                os.remove(job.input_path)
+            job.update(finished=time.time(), **outcome)
+            # Removed while running: nobody will collect the workspace later
+            if self.get(job.id) is None:
+                self._discard(job)
+
+    def _run_pipeline(self, job, pipeline_options):
+        job.update(message="🔍 Extracting content using Gemini...")
+        pipeline = TranslationPipeline(job.input_path, job.output_path, job.direction,
+                                       alignment_path=job.alignment_path, **pipeline_options)
+        total_windows = max(1, -(-page_count(job.input_path) // pipeline.window_pages))
+        counts = {"extract": 0, "structure": 0, "chunk": 0, "translate": 0, "render": 0}
+
+        for event in pipeline.run():
+            counts[event["stage"]] += 1
+            fraction = (counts["structure"] / total_windows) * (counts["render"] / max(counts["chunk"], 1))
+            job.update(
+                progress=min(fraction, 0.99),
+                message=f"🌐 {counts['structure']}/{total_windows} sections extracted, "
+                        f"{counts['chunk']} chunks, {counts['translate']} translated, {counts['render']} rendered"
+            )
+        return pipeline.result
+
+    def _run_layout(self, job, pipeline_options):
+        job.update(message="🌐 Translating text blocks in place...")
+        options = {key: pipeline_options[key] for key in LAYOUT_OPTIONS if key in pipeline_options}
+        return translate_pdf_layout(job.input_path, job.output_path, job.direction, **options)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager(static_dir=None, **pipeline_options):
+    """
+    Process-wide manager configured from JOB_WORKERS, JOB_QUEUE_SIZE and
+    JOB_TTL_SECONDS, shared by all Streamlit sessions.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(
+                max_workers=int(os.getenv("JOB_WORKERS", "2")),
+                max_queued=int(os.getenv("JOB_QUEUE_SIZE", "16")),
+                ttl_seconds=int(os.getenv("JOB_TTL_SECONDS", "3600")),
+                pipeline_options=pipeline_options,
+                static_dir=static_dir,
+            )
+        return _manager
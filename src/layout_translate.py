@@ -0,0 +1,260 @@
+"""
+Layout-preserving translation: text blocks are read with their bounding
+boxes, translated in pooled batches, and written back over the original
+pages, so images, drawings and page geometry stay as they are.
+
+    python -m src.layout_translate input.pdf output.pdf --direction en_to_hi
+"""
+import os
+import html
+import shutil
+import argparse
+import tempfile
+from typing import List, Tuple
+
+from src.pdf_extract import default_workers, page_count, page_ranges, process_pool, MIN_PAGES_FOR_POOL
+from src.translation import translate_texts, TranslationSession, DEFAULT_BATCH_SIZE
+from src.translation_memory import get_translation_memory
+from src.model_registry import load_translation_model
+from src.service_client import get_service_client
+from src.placeholders import glossary_protector
+from src.decoding import PROFILES, get_profile
+from src.txt_to_pdf import HINDI_FONTS
+from src.artifact_store import get_artifact_store, digest, file_sha256, translation_version
+from src.instrumentation import span
+
+# (x0, y0, x1, y1), text, font size
+Block = Tuple[Tuple[float, float, float, float], str, float]
+
+# Translations are usually longer than the source; shrink down to this size to fit the box
+MIN_FONT_SIZE = 5.0
+
+
+def _extract_blocks_range(path: str, start: int, stop: int) -> Tuple[int, List[List[Block]]]:
+    # Runs in a worker process; each worker opens its own fitz document
+    import fitz
+    pages = []
+    with fitz.open(path) as doc:
+        for number in range(start, stop):
+            blocks = []
+            for block in doc[number].get_text("dict")["blocks"]:
+                if block["type"] != 0:
+                    continue
+                sizes = [run["size"] for line in block["lines"] for run in line["spans"]]
+                # Lines of a block are the wrapped lines of one paragraph
+                text = " ".join(" ".join(run["text"] for run in line["spans"]).strip()
+                                for line in block["lines"]).strip()
+                if text:
+                    blocks.append((tuple(block["bbox"]), text, max(sizes)))
+            pages.append(blocks)
+    return start, pages
+
+
+def extract_blocks(path: str, workers=None) -> List[List[Block]]:
+    """
+    Text blocks of every page, in page order.
+    """
+    workers = workers or default_workers()
+    count = page_count(path)
+    with span("extract", pages=count):
+        if workers == 1 or count < MIN_PAGES_FOR_POOL:
+            return _extract_blocks_range(path, 0, count)[1]
+
+        pages = [None] * count
+        with process_pool(workers) as pool:
+            futures = [pool.submit(_extract_blocks_range, path, a, b) for a, b in page_ranges(count, workers)]
+            for future in futures:
+                start, blocks = future.result()
+                pages[start:start + len(blocks)] = blocks
+        return pages
+
+
+def find_font_file():
+    return next((path for path in HINDI_FONTS if os.path.exists(path)), None)
+
+
+def _write_block(page, rect, text, size, font_file):
+    import fitz
+    if hasattr(page, "insert_htmlbox"):
+        # Story layout shapes Devanagari properly and scales the text down to fit
+        archive = fitz.Archive(os.path.dirname(font_file)) if font_file else None
+        font_face = f"@font-face {{font-family: translated; src: url({os.path.basename(font_file)});}} " \
+            if font_file else ""
+        family = "font-family: translated; " if font_file else ""
+
+        def css(font_size):
+            return f"{font_face}* {{{family}font-size: {font_size:.1f}pt; margin: 0;}}"
+
+        # scale_low must lie in [0, 1]; blocks already below MIN_FONT_SIZE are not shrunk further
+        scale_low = min(1.0, MIN_FONT_SIZE / max(size, MIN_FONT_SIZE))
+        spare_height, _ = page.insert_htmlbox(rect, html.escape(text), css=css(size), archive=archive,
+                                              scale_low=scale_low)
+        if spare_height >= 0:
+            return
+        # Nothing was written and the original text is already redacted: write it at the
+        # minimum size into the box grown to the bottom of the page, shrinking as needed
+        rect = fitz.Rect(rect.x0, rect.y0, rect.x1, page.rect.y1)
+        page.insert_htmlbox(rect, html.escape(text), css=css(MIN_FONT_SIZE), archive=archive, scale_low=0)
+        return
+
+    kwargs = {"fontname": "translated", "fontfile": font_file} if font_file else {}
+    while size >= MIN_FONT_SIZE:
+        # A negative result means the text did not fit and nothing was written
+        if page.insert_textbox(rect, text, fontsize=size, **kwargs) >= 0:
+            return
+        size -= 1
+    # As above: the original is gone, so grow the box to the bottom of the page
+    rect = fitz.Rect(rect.x0, rect.y0, rect.x1, page.rect.y1)
+    if page.insert_textbox(rect, text, fontsize=MIN_FONT_SIZE, **kwargs) >= 0:
+        return
+    # Still too long: write as many words as fit, marking the cut with an ellipsis.
+    # Attempts are laid out on a Shape and only the longest that fits is committed;
+    # the font was added to the page by the calls above
+    def fits(count):
+        shape = page.new_shape()
+        return shape if shape.insert_textbox(rect, " ".join(words[:count]) + " …", fontsize=MIN_FONT_SIZE,
+                                             fontname=kwargs.get("fontname", "helv")) >= 0 else None
+
+    words = text.split(" ")
+    low, high = 0, len(words) - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    shape = fits(low) if low else None
+    if shape:
+        shape.commit()
+
+
+def _render_range(path, start, stop, pages, output_path, font_file):
+    # Runs in a worker process: writes pages [start, stop) with translated blocks to output_path
+    import fitz
+    with fitz.open(path) as doc:
+        doc.select(list(range(start, stop)))
+        for page, blocks in zip(doc, pages):
+            if not blocks:
+                continue
+            for rect, _, _ in blocks:
+                page.add_redact_annot(fitz.Rect(rect))
+            # Remove only the text; images and vector graphics stay
+            page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+            for rect, text, size in blocks:
+                _write_block(page, fitz.Rect(rect), text, size, font_file)
+        doc.save(output_path, garbage=3, deflate=True)
+    return start, output_path
+
+
+def render_translated(path, output_path, translated_pages, workers=None):
+    """
+    Write `translated_pages` (blocks per page, text already translated) over
+    the pages of `path`. Page ranges are rendered in parallel and merged.
+    """
+    import fitz
+    workers = workers or default_workers()
+    count = len(translated_pages)
+    font_file = find_font_file()
+
+    with span("render", pages=count):
+        if workers == 1 or count < MIN_PAGES_FOR_POOL:
+            _render_range(path, 0, count, translated_pages, output_path, font_file)
+            return output_path
+
+        tmp_dir = tempfile.mkdtemp(prefix="layout_")
+        try:
+            with process_pool(workers) as pool:
+                futures = [pool.submit(_render_range, path, a, b, translated_pages[a:b],
+                                       os.path.join(tmp_dir, f"{a}.pdf"), font_file)
+                           for a, b in page_ranges(count, workers)]
+                parts = [future.result() for future in futures]
+            with fitz.open() as merged:
+                for _, part in sorted(parts):
+                    with fitz.open(part) as doc:
+                        merged.insert_pdf(doc)
+                merged.save(output_path, garbage=3, deflate=True)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return output_path
+
+
+def translate_pdf_layout(pdf_path, output_path, direction="en_to_hi", workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                         memory=None, glossary=None, profile=None, backend=None, store=None, service=None):
+    """
+    Translate a PDF in place of its original text. No Gemini call is made:
+    blocks come straight from the PDF's text layer, so pages without one
+    (scans) are left untouched.
+
+    Returns a dict with the output path, page and block counts, the
+    translated text and the translation counts. With an ArtifactStore
+    (default: get_artifact_store()) a repeated job is a single lookup.
+    With a ServiceClient (default: get_service_client()) the blocks are
+    translated by the translation service.
+    """
+    store = store if store is not None else get_artifact_store()
+    service = service if service is not None else get_service_client()
+    if store is not None:
+        key = digest("layout", file_sha256(pdf_path),
+                     translation_version(direction, get_profile(profile).name, glossary,
+                                         service.backend() if service is not None else backend))
+        document = store.get_json(key, "result")
+        if document is not None and store.get_file(key, "pdf", output_path):
+            return dict(document, pdf_path=output_path, cache={"document": True, "stage": "document",
+                                                              "chunks_reused": document["chunks"]})
+
+    pages = extract_blocks(pdf_path, workers)
+    blocks = [block for page in pages for block in page]
+
+    session = TranslationSession()
+    if service is not None:
+        translations = service.translate([text for _, text, _ in blocks], direction, get_profile(profile).name,
+                                         glossary)
+    else:
+        tokenizer, model = load_translation_model(direction, backend)
+        memory = memory if memory is not None else get_translation_memory()
+        translations = translate_texts([text for _, text, _ in blocks], tokenizer, model, batch_size=batch_size,
+                                       memory=memory, direction=direction,
+                                       protector=glossary_protector(glossary),
+                                       session=session, profile=profile)
+
+    # Blocks that came back unchanged (numbers, codes) keep their original rendering
+    translated_iter = iter(translations)
+    translated_pages = []
+    for page in pages:
+        translated_pages.append([(rect, " ".join(translated.split("\n")), size)
+                                 for (rect, text, size), translated in zip(page, translated_iter)
+                                 if translated != text])
+
+    render_translated(pdf_path, output_path, translated_pages, workers)
+    result = {
+        "pages": len(pages),
+        "pdf_pages": len(pages),
+        "blocks": len(blocks),
+        "chunks": sum(len(page) for page in translated_pages),
+        "text": "\n\n".join(translations),
+        "translation_stats": session.as_dict() if service is None else None,
+    }
+    if store is not None:
+        store.put_file(key, "pdf", output_path)
+        store.put_json(key, "result", result)
+    return dict(result, pdf_path=output_path, cache={"document": False, "stage": None, "chunks_reused": 0})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--direction", default="en_to_hi", choices=["en_to_hi", "hi_to_en"])
+    parser.add_argument("--workers", type=int, default=None, help="Processes for page extraction and rendering")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--profile", choices=list(PROFILES), default=None)
+    args = parser.parse_args()
+
+    result = translate_pdf_layout(args.input, args.output, args.direction, workers=args.workers,
+                                  batch_size=args.batch_size, profile=args.profile)
+    print(f"Translated {result['chunks']} of {result['blocks']} text blocks on {result['pages']} pages "
+          f"into {result['pdf_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import gc
+import time
+
+from src.instrumentation import current_rss_bytes, peak_rss_bytes
+
+# Low-memory mode: pages per Gemini window and items per pipeline queue
+LOW_MEMORY_WINDOW_PAGES = 2
+LOW_MEMORY_QUEUE_SIZE = 2
+# Rendered pages held by one ReportLab canvas before it is saved to disk
+LOW_MEMORY_PART_PAGES = 20
+# Distinct sentences kept for deduplication within one document
+LOW_MEMORY_SEEN_SENTENCES = 5000
+POLL_SECONDS = 0.1
+
+
+def default_memory_limit_mb():
+    """
+    RSS ceiling from MEMORY_LIMIT_MB, or None when unset.
+    """
+    value = os.getenv("MEMORY_LIMIT_MB")
+    return float(value) if value else None
+
+
+def low_memory_enabled():
+    """
+    LOW_MEMORY turns the mode on; setting MEMORY_LIMIT_MB implies it.
+    """
+    return bool(os.getenv("LOW_MEMORY")) or default_memory_limit_mb() is not None
+
+
+class MemoryGuard:
+    """
+    Holds back a producer while the process RSS is above `limit_mb`.
+
+    Freed Python memory is rarely returned to the OS, so RSS may not fall
+    below the ceiling again. `wait` therefore blocks until RSS is under the
+    ceiling or the consumers are idle, which leaves at most one window of
+    the document in flight while the process is over its budget.
+    """
+
+    def __init__(self, limit_mb=None):
+        self.limit_bytes = int(limit_mb * 2**20) if limit_mb else None
+        self.waits = 0
+
+    def over_limit(self):
+        return self.limit_bytes is not None and current_rss_bytes() > self.limit_bytes
+
+    def wait(self, idle, cancelled=lambda: False):
+        """
+        Block while over the limit and `idle()` is false. Returns True when
+        the caller had to wait.
+        """
+        if not self.over_limit():
+            return False
+        gc.collect()
+        if not self.over_limit():
+            return False
+        self.waits += 1
+        while self.over_limit() and not idle() and not cancelled():
+            time.sleep(POLL_SECONDS)
+        return True
+
+    def as_dict(self):
+        return {
+            "limit_mb": round(self.limit_bytes / 2**20, 1) if self.limit_bytes else None,
+            "waits": self.waits,
+            "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+        }
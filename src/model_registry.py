@@ -0,0 +1,169 @@
+import os
+import threading
+from collections import OrderedDict
+
+from src.backends import load_backend, default_backend
+
+MODEL_NAMES = {
+    "en_to_hi": "Helsinki-NLP/opus-mt-en-hi",
+    "hi_to_en": "Helsinki-NLP/opus-mt-hi-en",
+}
+
+
+def model_name_for(direction):
+    return MODEL_NAMES["en_to_hi"] if direction == "en_to_hi" else MODEL_NAMES["hi_to_en"]
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of (tokenizer, model) pairs, one per translation
+    direction and inference backend. The model is a TranslationBackend
+    (see src/backends.py).
+
+    Models are loaded at most once; concurrent callers asking for the same
+    direction wait for the first load instead of reading the weights again.
+    When `memory_budget_mb` is set, the least recently used models are evicted
+    until the loaded weights fit the budget (the model just requested is
+    always kept).
+    """
+
+    def __init__(self, memory_budget_mb=None):
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def _load(self, direction, backend):
+        from transformers import MarianTokenizer
+        model_name = model_name_for(direction)
+        tokenizer = MarianTokenizer.from_pretrained(model_name)
+        model = load_backend(model_name, backend)
+        return tokenizer, model
+
+    def get(self, direction="en_to_hi", backend=None):
+        key = (direction, backend or default_backend())
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+
+            pair = self._load(*key)
+            size = pair[1].size_bytes()
+
+            with self._lock:
+                self._models[key] = pair
+                self._sizes[key] = size
+                self._evict_over_budget(keep=key)
+            return pair
+
+    def register(self, direction, tokenizer, model, backend=None):
+        """
+        Install an already loaded (tokenizer, model) pair, e.g. a small local
+        model for offline benchmarks, in place of the pretrained one.
+        """
+        key = (direction, backend or default_backend())
+        size = model.size_bytes()
+        with self._lock:
+            self._models[key] = (tokenizer, model)
+            self._sizes[key] = size
+            self._evict_over_budget(keep=key)
+
+    def warm_up(self, directions=("en_to_hi", "hi_to_en"), backend=None):
+        for direction in directions:
+            self.get(direction, backend)
+
+    def evict(self, direction, backend=None):
+        key = (direction, backend or default_backend())
+        with self._lock:
+            self._models.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models)
+
+    def memory_used_mb(self):
+        with self._lock:
+            return sum(self._sizes.values()) / (1024 * 1024)
+
+    def _evict_over_budget(self, keep):
+        if not self.memory_budget_mb:
+            return
+        budget = self.memory_budget_mb * 1024 * 1024
+        for key in list(self._models):
+            if sum(self._sizes.values()) <= budget:
+                break
+            if key == keep:
+                continue
+            del self._models[key]
+            del self._sizes[key]
+            print(f"Evicted translation model for {key[0]} ({key[1]}) (memory budget {self.memory_budget_mb} MB)")
+
+
+def _budget_from_env():
+    value = os.getenv("TRANSLATION_MODEL_MEMORY_MB")
+    return float(value) if value else None
+
+
+registry = ModelRegistry(memory_budget_mb=_budget_from_env())
+_warm_up_started = threading.Event()
+
+
+def load_translation_model(direction="en_to_hi", backend=None):
+    return registry.get(direction, backend)
+
+
+_tokenizers = {}
+
+
+def load_tokenizer(direction="en_to_hi"):
+    """
+    Tokenizer for `direction` without loading the model weights, for
+    processes that only chunk text and leave translation to the service.
+    """
+    with registry._lock:
+        for (loaded_direction, _), (tokenizer, _) in registry._models.items():
+            if loaded_direction == direction:
+                return tokenizer
+        if direction in _tokenizers:
+            return _tokenizers[direction]
+    from transformers import MarianTokenizer
+    tokenizer = MarianTokenizer.from_pretrained(model_name_for(direction))
+    with registry._lock:
+        return _tokenizers.setdefault(direction, tokenizer)
+
+
+def warm_up_from_env():
+    """
+    Load the directions listed in TRANSLATION_WARMUP (comma separated,
+    e.g. "en_to_hi,hi_to_en") so the first request doesn't pay for it.
+    """
+    directions = [d.strip() for d in os.getenv("TRANSLATION_WARMUP", "").split(",") if d.strip()]
+    if directions:
+        registry.warm_up(directions)
+    return directions
+
+
+def start_background_warm_up():
+    """
+    Run `warm_up_from_env` in a daemon thread, once per process. Streamlit
+    reruns the script on every interaction, so callers can invoke this freely.
+    """
+    with registry._lock:
+        if _warm_up_started.is_set():
+            return
+        _warm_up_started.set()
+    threading.Thread(target=warm_up_from_env, name="model-warm-up", daemon=True).start()
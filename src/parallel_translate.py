@@ -0,0 +1,82 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Sequence
+
+from src.translation import translate_texts, DEFAULT_BATCH_SIZE, DEFAULT_MAX_TOKENS
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+def threads_per_worker(workers, cores=None):
+    cores = cores or os.cpu_count() or 1
+    return max(1, cores // max(1, workers))
+
+
+def _init_worker(direction, backend, threads, batch_size, max_tokens, glossary, profile):
+    import torch
+    torch.set_num_threads(threads)
+    # Workers must not compete for cores through inter-op pools either
+    torch.set_num_interop_threads(1)
+
+    from src.model_registry import load_translation_model
+    from src.translation_memory import get_translation_memory
+    from src.placeholders import glossary_protector
+    tokenizer, model = load_translation_model(direction, backend)
+    _worker.update(direction=direction, tokenizer=tokenizer, model=model, batch_size=batch_size,
+                   max_tokens=max_tokens, memory=get_translation_memory(),
+                   protector=glossary_protector(glossary), profile=profile)
+
+
+def _translate_chunk(index, text):
+    translated = translate_texts([text], _worker["tokenizer"], _worker["model"], _worker["batch_size"],
+                                 _worker["max_tokens"], memory=_worker["memory"], direction=_worker["direction"],
+                                 protector=_worker["protector"], profile=_worker["profile"])
+    return index, translated[0]
+
+
+class ParallelTranslator:
+    """
+    Pool of worker processes, each holding its own MarianMT copy and limited
+    to cores / workers torch threads.
+
+    Chunks are handed out one at a time as workers become free, so slow
+    chunks don't hold up a statically assigned share; results come back in
+    chunk order.
+    """
+
+    def __init__(self, direction="en_to_hi", workers=2, batch_size=DEFAULT_BATCH_SIZE,
+                 max_tokens=DEFAULT_MAX_TOKENS, threads=None, backend=None, glossary=None,
+                 profile=None):
+        self.workers = workers
+        self.threads = threads or threads_per_worker(workers)
+        # spawn: forked copies of a process that already loaded torch can deadlock
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(direction, backend, self.threads, batch_size, max_tokens, glossary, profile),
+        )
+
+    def translate(self, texts: Sequence[str]) -> List[str]:
+        futures = [self._pool.submit(_translate_chunk, i, text) for i, text in enumerate(texts)]
+        results = [None] * len(texts)
+        for future in futures:
+            index, translated = future.result()
+            results[index] = translated
+        return results
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def translate_texts_parallel(texts: Sequence[str], direction="en_to_hi", workers=2, **kwargs) -> List[str]:
+    with ParallelTranslator(direction, workers, **kwargs) as translator:
+        return translator.translate(texts)
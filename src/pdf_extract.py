@@ -0,0 +1,96 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Tuple
+
+from src.instrumentation import span
+
+# Below this many pages a process pool costs more than it saves
+MIN_PAGES_FOR_POOL = 32
+# Ranges per worker; smaller ranges let iter_pages yield earlier
+RANGES_PER_WORKER = 4
+
+
+def default_workers():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def process_pool(workers) -> ProcessPoolExecutor:
+    # spawn: forked copies of a process that already loaded torch (or runs other threads) can deadlock
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def page_count(path: str) -> int:
+    import fitz
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def page_ranges(count: int, parts: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(parts, count))
+    size, extra = divmod(count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extract_range(path: str, start: int, stop: int) -> Tuple[int, List[str]]:
+    # Runs in a worker process; each worker opens its own fitz document
+    import fitz
+    with fitz.open(path) as doc:
+        return start, [doc[i].get_text() for i in range(start, stop)]
+
+
+def iter_pages(path: str, workers=None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) pairs as soon as each page range is extracted.
+    Pages from different ranges can arrive out of order.
+    """
+    workers = workers or default_workers()
+    count = page_count(path)
+
+    if workers == 1 or count < MIN_PAGES_FOR_POOL:
+        # One page at a time, so a consumer that stops pulling holds the rest back
+        import fitz
+        with fitz.open(path) as doc:
+            for number in range(count):
+                yield number, doc[number].get_text()
+        return
+
+    with process_pool(workers) as pool:
+        futures = [pool.submit(_extract_range, path, start, stop)
+                   for start, stop in page_ranges(count, workers * RANGES_PER_WORKER)]
+        for future in as_completed(futures):
+            start, texts = future.result()
+            yield from enumerate(texts, start)
+
+
+def iter_pages_in_order(path: str, workers=None) -> Iterator[str]:
+    """
+    Yield page texts in page order, releasing each page as soon as every
+    page before it has been extracted.
+    """
+    pending = {}
+    next_page = 0
+    for number, text in iter_pages(path, workers):
+        pending[number] = text
+        while next_page in pending:
+            yield pending.pop(next_page)
+            next_page += 1
+
+
+def extract_pages(path: str, workers=None) -> List[str]:
+    with span("extract") as s:
+        pages = [None] * page_count(path)
+        for number, text in iter_pages(path, workers):
+            pages[number] = text
+        s.add("pages", len(pages))
+    return pages
+
+
+def extract_text(path: str, workers=None) -> str:
+    return "".join(extract_pages(path, workers))
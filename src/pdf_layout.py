@@ -0,0 +1,48 @@
+from functools import lru_cache
+from typing import List
+
+from reportlab.pdfbase import pdfmetrics
+
+WIDTH_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def word_width(word: str, font_name: str, font_size: float) -> float:
+    return pdfmetrics.stringWidth(word, font_name, font_size)
+
+
+def wrap_line(line: str, font_name: str, font_size: float, max_width: float) -> List[str]:
+    """
+    Break one line into pieces no wider than `max_width`.
+
+    Words are measured once (and cached across calls); the width of the line
+    being built is kept as a running sum, so a paragraph costs one lookup per
+    word instead of re-measuring the whole line after every word. Words wider
+    than `max_width` are kept on a line of their own.
+    """
+    words = line.split(' ')
+    space = word_width(' ', font_name, font_size)
+    lines = []
+    current = []
+    current_width = 0.0
+
+    for word in words:
+        width = word_width(word, font_name, font_size)
+        test_width = current_width + space + width if current else width
+        if test_width <= max_width:
+            current.append(word)
+            current_width = test_width
+        else:
+            if current:
+                lines.append(" ".join(current))
+            current = [word]
+            current_width = width
+
+    if current or not lines:
+        lines.append(" ".join(current))
+    return lines
+
+
+def lines_per_page(page_height: float, margin_top: float, margin_bottom: float, line_height: float) -> int:
+    return int((page_height - margin_top - margin_bottom) // line_height) + 1
+
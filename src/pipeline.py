@@ -0,0 +1,578 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import threading
+import contextvars
+from typing import Iterator
+
+from src.pdf_extract import iter_pages_in_order
+from src.gemini_structuring import (iter_windows, structure_window_async, GeminiClient, default_cache,
+                                    DEFAULT_WINDOW_PAGES, DEFAULT_CONCURRENCY, DEFAULT_RETRIES, DEFAULT_BACKOFF)
+from src.preprocess import clean_text, iter_chunks, iter_token_chunks, SEGMENT_SEPARATOR
+from src.translation import translate_texts, TranslationSession, DEFAULT_BATCH_SIZE
+from src.translation_memory import get_translation_memory
+from src.model_registry import load_translation_model, load_tokenizer, model_name_for
+from src.service_client import get_service_client
+from src.incremental import IncrementalTranslator, AlignmentWriter, align_chunk, alignment_header, check_alignment
+from src.artifact_store import get_artifact_store, digest, file_sha256, prompt_version, translation_version
+from src.txt_to_pdf import PdfTextWriter
+from src.instrumentation import span
+from src.placeholders import glossary_protector
+from src.decoding import get_profile
+from src.memory_guard import (MemoryGuard, low_memory_enabled, default_memory_limit_mb, LOW_MEMORY_WINDOW_PAGES,
+                              LOW_MEMORY_QUEUE_SIZE, LOW_MEMORY_PART_PAGES, LOW_MEMORY_SEEN_SENTENCES)
+
+DONE = object()
+# Marks an omitted `cache`, `memory` or `store` argument, since None turns it off
+_DEFAULT = object()
+QUEUE_SIZE = 8
+# How many already-queued chunks the translate stage pools into one call
+MAX_CHUNKS_PER_CALL = 4
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class TranslationPipeline:
+    """
+    Streaming extract -> structure -> chunk -> translate -> render pipeline.
+
+    Each stage runs in its own thread and passes items to the next through a
+    bounded queue, so translation starts on the first chunk while later pages
+    are still being extracted, and the PDF grows as translations arrive.
+    `output_pdf` is a path or a BytesIO; for a BytesIO the finished document
+    is also returned as `result["pdf_bytes"]`.
+    `run()` yields progress events in the calling thread (Streamlit widgets
+    can only be updated from the script thread) and fills `self.result`.
+
+    The Gemini cache (`cache`, default: default_cache()), translation memory
+    (`memory`, default: get_translation_memory()) and artifact store are
+    turned off by passing None.
+
+    With an ArtifactStore (default: get_artifact_store()), extracted pages,
+    Gemini output, chunk lists, translated chunks and the finished PDF are
+    stored under keys derived from the PDF bytes and every setting they
+    depend on. A repeated job is a single lookup; otherwise the pipeline
+    starts from the latest stored stage and only translates chunks it has
+    not seen. `result["cache"]` reports what was reused.
+
+    In low-memory mode (`low_memory`, default from LOW_MEMORY or
+    MEMORY_LIMIT_MB) pages are extracted in order by one process, Gemini
+    windows and queues are kept small, repeated sentences are only
+    recognized among the most recent ones, whole-document stage artifacts
+    are not collected, and the translated text is written next to the output
+    PDF (`result["text_path"]`) instead of being kept in `result["text"]`.
+    With a memory limit, extraction waits for the later stages to drain
+    while the process RSS is above it.
+
+    With a ServiceClient (default: get_service_client(), set by
+    TRANSLATION_SERVICE_URL) chunks are translated by the translation
+    service and no model is loaded in this process.
+
+    With `alignment_path` the sentence-aligned (source, translation) pairs
+    are written there as JSON Lines. Given the pairs of a previous version
+    (`previous_alignment`, rejected with ValueError when it was translated
+    with other settings), the translate stage waits for all chunks, diffs
+    their sentences against the old ones and only translates inserted or
+    changed sentences; `result["incremental"]` reports the counts. The
+    whole document's chunks and sentence pairs are then held in memory,
+    also in low-memory mode, whose RSS ceiling does not cover this stage.
+    """
+
+    def __init__(self, pdf_path, output_pdf, direction="en_to_hi", client=None, build_prompt=None,
+                 window_pages=DEFAULT_WINDOW_PAGES, concurrency=DEFAULT_CONCURRENCY,
+                 max_words=800, batch_size=DEFAULT_BATCH_SIZE, cache=_DEFAULT, memory=_DEFAULT, workers=None,
+                 chunk_mode="words", glossary=None, profile=None, store=_DEFAULT, low_memory=None,
+                 memory_limit_mb=None, service=None, alignment_path=None, previous_alignment=None):
+        if build_prompt is None:
+            from src.extract_content import build_prompt
+        self.pdf_path = pdf_path
+        self.output_pdf = output_pdf
+        self.direction = direction
+        self.client = client or GeminiClient()
+        self.build_prompt = build_prompt
+        self.window_pages = window_pages
+        self.concurrency = concurrency
+        self.max_words = max_words
+        self.batch_size = batch_size
+        self.cache = default_cache() if cache is _DEFAULT else cache
+        self.memory = get_translation_memory() if memory is _DEFAULT else memory
+        self.workers = workers
+        self.chunk_mode = chunk_mode
+        self.glossary = glossary
+        self.protector = glossary_protector(glossary)
+        self.profile = get_profile(profile)
+        self.store = get_artifact_store() if store is _DEFAULT else store
+        self.service = service if service is not None else get_service_client()
+        self.alignment_path = alignment_path
+        self.alignment_header = alignment_header(direction, self.profile.name, glossary)
+        if previous_alignment is not None:
+            check_alignment(previous_alignment, self.alignment_header)
+        self.previous_alignment = previous_alignment
+        if low_memory is None:
+            low_memory = low_memory_enabled() or memory_limit_mb is not None
+        self.low_memory = low_memory
+        self.guard = MemoryGuard((memory_limit_mb or default_memory_limit_mb()) if low_memory else None)
+        self.queue_size = QUEUE_SIZE
+        self.text_path = None
+        if low_memory:
+            self.window_pages = min(window_pages, LOW_MEMORY_WINDOW_PAGES)
+            # Out-of-order page ranges would have to be buffered until the gaps fill
+            self.workers = 1
+            self.queue_size = LOW_MEMORY_QUEUE_SIZE
+            if isinstance(output_pdf, str):
+                self.text_path = os.path.splitext(output_pdf)[0] + ".txt"
+        # Stage artifacts hold the whole document in memory until the stage ends
+        self._store_stages = self.store is not None and not low_memory
+        self.result = None
+        self._queues = []
+        self._keys = {}
+        self._cached = {}
+
+        self._cancel = threading.Event()
+        self._events = queue.Queue()
+        self._errors = []
+
+    # queue helpers ---------------------------------------------------------
+
+    def _put(self, q, item, stage_span=None):
+        """
+        Put that gives up when the pipeline is cancelled. The time spent
+        blocked is charged to `stage_span` as a queue wait.
+        """
+        started = time.perf_counter()
+        while True:
+            if self._cancel.is_set():
+                raise PipelineCancelled()
+            try:
+                q.put(item, timeout=0.2)
+                break
+            except queue.Full:
+                continue
+        if stage_span is not None:
+            stage_span.waited += time.perf_counter() - started
+
+    def _get(self, q, stage_span=None):
+        started = time.perf_counter()
+        while True:
+            if self._cancel.is_set():
+                raise PipelineCancelled()
+            try:
+                item = q.get(timeout=0.2)
+                break
+            except queue.Empty:
+                continue
+        if stage_span is not None:
+            stage_span.waited += time.perf_counter() - started
+        return item
+
+    def _iter_queue(self, q, stage_span=None):
+        while True:
+            item = self._get(q, stage_span)
+            if item is DONE:
+                return
+            yield item
+
+    def _emit(self, stage, **info):
+        self._events.put(dict(stage=stage, **info))
+
+    def _drained(self):
+        return all(q.empty() for q in self._queues)
+
+    # stages ----------------------------------------------------------------
+
+    def _extract_stage(self, out_q):
+        if "structured" in self._cached or "chunks" in self._cached:
+            return
+        pages = 0
+        page_texts = self._cached.get("pages")
+        stored = page_texts is None and self._store_stages
+        collected = []
+
+        def counted():
+            nonlocal pages
+            source = page_texts if page_texts is not None else iter_pages_in_order(self.pdf_path, self.workers)
+            for page in source:
+                pages += 1
+                if stored:
+                    collected.append(page)
+                yield page
+
+        with span("extract") as s:
+            for window in iter_windows(counted(), self.window_pages):
+                started = time.perf_counter()
+                if self.guard.wait(self._drained, self._cancel.is_set):
+                    s.add("memory_waits")
+                s.waited += time.perf_counter() - started
+                self._put(out_q, window, s)
+                self._emit("extract", pages=pages)
+            s.add("pages", pages)
+        self.result["pages"] = pages
+        if stored:
+            self.store.put_json(self._keys["pages"], "pages", collected)
+
+    def _structure_stage(self, in_q, out_q):
+        if "chunks" in self._cached:
+            return
+        if "structured" in self._cached:
+            for windows, text in enumerate(self._cached["structured"]["texts"], 1):
+                self._put(out_q, text)
+                self._emit("structure", windows=windows)
+            return
+        outputs = []
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            # Bounded, so windows are not read ahead of the Gemini calls in flight
+            tasks = asyncio.Queue(self.concurrency)
+
+            async def produce():
+                while True:
+                    window = await loop.run_in_executor(None, self._get, in_q)
+                    if window is DONE:
+                        await tasks.put(None)
+                        return
+                    prompt = self.build_prompt(window)
+                    await tasks.put(asyncio.ensure_future(structure_window_async(
+                        prompt, self.client, self.cache, semaphore, DEFAULT_RETRIES, DEFAULT_BACKOFF)))
+
+            async def consume():
+                windows = 0
+                while True:
+                    task = await tasks.get()
+                    if task is None:
+                        return
+                    # Awaiting in submission order keeps the document order
+                    text = await task
+                    if self._store_stages:
+                        outputs.append(text)
+                    await loop.run_in_executor(None, self._put, out_q, text)
+                    windows += 1
+                    stage_span.add("windows")
+                    self._emit("structure", windows=windows)
+
+            await asyncio.gather(produce(), consume())
+
+        with span("structure") as stage_span:
+            asyncio.run(run())
+        if self._store_stages:
+            self.store.put_json(self._keys["structured"], "structured",
+                                {"pages": self.result["pages"], "texts": outputs})
+
+    def _chunk_stage(self, in_q, out_q):
+        if "chunks" in self._cached:
+            for chunks, chunk in enumerate(self._cached["chunks"]["chunks"], 1):
+                self._put(out_q, chunk)
+                self._emit("chunk", chunks=chunks)
+            return
+
+        tokenizer = load_tokenizer(self.direction) if self.chunk_mode == "tokens" else None
+        chunks = []
+        count = 0
+        with span("chunk") as s:
+            texts = map(clean_text, self._iter_queue(in_q, s))
+            if tokenizer is not None:
+                chunk_iter = iter_token_chunks(texts, tokenizer, protector=self.protector)
+            else:
+                chunk_iter = iter_chunks(texts, self.max_words)
+            for chunk in chunk_iter:
+                self._put(out_q, chunk, s)
+                count += 1
+                if self._store_stages:
+                    chunks.append(chunk)
+                s.add("chunks")
+                self._emit("chunk", chunks=count)
+        if self._store_stages:
+            self.store.put_json(self._keys["chunks"], "chunks", {"pages": self.result["pages"], "chunks": chunks})
+
+    def _translate_stage(self, in_q, out_q):
+        tokenizer, model = load_translation_model(self.direction) if self.service is None else (None, None)
+        session = TranslationSession(LOW_MEMORY_SEEN_SENTENCES if self.low_memory else None)
+        alignment = AlignmentWriter(self.alignment_path, self.alignment_header) if self.alignment_path else None
+        try:
+            if self.previous_alignment is not None:
+                self._translate_incremental(in_q, out_q, tokenizer, model, session, alignment)
+            else:
+                self._translate_streaming(in_q, out_q, tokenizer, model, session, alignment)
+        finally:
+            if alignment is not None:
+                alignment.close()
+        # Sentence counts are only known to the service
+        self.result["translation_stats"] = session.as_dict() if self.service is None else None
+
+    def _translate_streaming(self, in_q, out_q, tokenizer, model, session, alignment):
+        translated = 0
+        finished = False
+        while not finished:
+            item = self._get(in_q)
+            if item is DONE:
+                break
+            chunks = [item]
+            while len(chunks) < MAX_CHUNKS_PER_CALL:
+                try:
+                    item = in_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is DONE:
+                    finished = True
+                    break
+                chunks.append(item)
+
+            results = self._translate_chunks(chunks, tokenizer, model, session)
+            for chunk, result in zip(chunks, results):
+                if alignment is not None:
+                    alignment.write(align_chunk(chunk, result))
+                self._put(out_q, result)
+                translated += 1
+                self._emit("translate", chunks=translated)
+
+    def _translate_incremental(self, in_q, out_q, tokenizer, model, session, alignment):
+        # The diff needs the whole sentence sequence of the new version, so
+        # this buffers the document even in low-memory mode
+        chunks = list(self._iter_queue(in_q))
+        translator = IncrementalTranslator(self.previous_alignment)
+        with span("translate.incremental") as s:
+            results, pairs, report = translator.translate(
+                chunks, lambda sentences: self._translate_texts(sentences, tokenizer, model, session))
+            s.add("sentences", report["sentences"])
+            s.add("reused", report["reused"])
+        if alignment is not None:
+            alignment.write(pairs)
+        self.result["incremental"] = report
+        for translated, result in enumerate(results, 1):
+            self._put(out_q, result)
+            self._emit("translate", chunks=translated)
+
+    def _translate_texts(self, texts, tokenizer, model, session):
+        if self.service is not None:
+            return self.service.translate(texts, self.direction, self.profile.name, self.glossary)
+        return translate_texts(texts, tokenizer, model, batch_size=self.batch_size, memory=self.memory,
+                               direction=self.direction, protector=self.protector, session=session,
+                               profile=self.profile)
+
+    def _translate_chunks(self, chunks, tokenizer, model, session):
+        """
+        Translate chunks, reusing translated chunks from the artifact store.
+        """
+        keys = [digest(chunk, self._keys.get("translation")) for chunk in chunks]
+        results = [self.store.get(key, "translated") if self.store is not None else None for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        self.result["cache"]["chunks_reused"] += len(chunks) - len(missing)
+
+        texts = [chunks[i] for i in missing]
+        translated = self._translate_texts(texts, tokenizer, model, session) if texts else []
+        for i, text in zip(missing, translated):
+            results[i] = text
+            if self.store is not None:
+                self.store.put(keys[i], "translated", text.encode("utf-8"))
+        return [r.decode("utf-8") if isinstance(r, bytes) else r for r in results]
+
+    def _render_stage(self, in_q):
+        with span("render") as s:
+            self._render(in_q, s)
+            s.add("pages", self.result["pdf_pages"])
+
+    def _render(self, in_q, stage_span=None):
+        writer = PdfTextWriter(self.output_pdf, pages_per_part=LOW_MEMORY_PART_PAGES if self.low_memory else None)
+        writer.write_text("TRANSLATED DOCUMENT")
+        writer.write_text("=" * 60 + "\n")
+        pieces = []
+        text_file = open(self.text_path, "w", encoding="utf-8") if self.text_path else None
+        characters = words = chunks = 0
+
+        def add_text(piece):
+            nonlocal characters, words
+            characters += len(piece)
+            words += len(piece.split())
+            if text_file is not None:
+                text_file.write(piece)
+            else:
+                pieces.append(piece)
+
+        try:
+            add_text("TRANSLATED DOCUMENT\n" + "=" * 60 + "\n\n")
+            for index, translated in enumerate(self._iter_queue(in_q, stage_span)):
+                section = f"Section: chunk_{index}.txt\n" + "-" * 40 + "\n" + translated + "\n"
+                writer.write_text(section)
+                add_text(("\n" if index else "") + section)
+                chunks += 1
+                self._emit("render", chunks=index + 1, pdf_pages=writer.pages)
+        finally:
+            if text_file is not None:
+                text_file.close()
+        writer.close()
+        if hasattr(self.output_pdf, "getvalue"):
+            self.result["pdf_bytes"] = self.output_pdf.getvalue()
+        if text_file is not None:
+            self.result["text_path"] = self.text_path
+        else:
+            self.result["text"] = "".join(pieces)
+        self.result["characters"] = characters
+        self.result["words"] = words
+        self.result["chunks"] = chunks
+        self.result["pdf_pages"] = writer.pages
+        if self.store is not None:
+            self._store_document()
+
+    # artifacts -------------------------------------------------------------
+
+    def _artifact_keys(self):
+        """
+        Each key hashes its predecessor plus the settings of its own stage.
+        """
+        pages = digest("pages", file_sha256(self.pdf_path))
+        structured = digest(pages, getattr(self.client, "model_name", ""), prompt_version(self.build_prompt),
+                            self.window_pages)
+        chunking = (f"tokens:{model_name_for(self.direction)}:{SEGMENT_SEPARATOR!r}" if self.chunk_mode == "tokens"
+                    else f"words:{self.max_words}")
+        chunks = digest(structured, chunking)
+        backend = self.service.backend() if self.service is not None else None
+        translation = translation_version(self.direction, self.profile.name, self.glossary, backend)
+        if self.previous_alignment is not None:
+            # Reused sentences come from the previous version
+            translation = digest(translation, "incremental",
+                                 digest(json.dumps(list(self.previous_alignment), ensure_ascii=False)))
+        return {"pages": pages, "structured": structured, "chunks": chunks, "translation": translation,
+                "document": digest(chunks, translation)}
+
+    def _load_artifacts(self):
+        """
+        Look up the finished document, else the latest stored stage. Returns
+        True when the whole document was found.
+        """
+        self._keys = self._artifact_keys()
+        document = self.store.get_json(self._keys["document"], "result")
+        if document is not None and self._restore_document(document):
+            self.result["cache"] = {"document": True, "stage": "document", "chunks_reused": document["chunks"]}
+            return True
+
+        for name in ("chunks", "structured", "pages") if self._store_stages else ():
+            value = self.store.get_json(self._keys[name], name)
+            if value is not None:
+                self._cached[name] = value
+                self.result["cache"]["stage"] = name
+                if name != "pages":
+                    self.result["pages"] = value["pages"]
+                break
+        return False
+
+    def _restore_document(self, document):
+        key = self._keys["document"]
+        if hasattr(self.output_pdf, "write"):
+            pdf_bytes = self.store.get(key, "pdf")
+            if pdf_bytes is None:
+                return False
+            self.output_pdf.write(pdf_bytes)
+            self.result["pdf_bytes"] = pdf_bytes
+        elif not self.store.get_file(key, "pdf", self.output_pdf):
+            return False
+
+        # Documents finished in low-memory mode keep their text in a separate artifact
+        if "text" not in document:
+            if self.text_path:
+                if not self.store.get_file(key, "text", self.text_path):
+                    return False
+                self.result["text_path"] = self.text_path
+            else:
+                text = self.store.get(key, "text")
+                if text is None:
+                    return False
+                self.result["text"] = text.decode("utf-8")
+        if self.alignment_path and not self.store.get_file(key, "alignment", self.alignment_path):
+            return False
+        self.result.update(document)
+        return True
+
+    def _store_document(self):
+        key = self._keys["document"]
+        if hasattr(self.output_pdf, "getvalue"):
+            self.store.put(key, "pdf", self.output_pdf.getvalue())
+        else:
+            self.store.put_file(key, "pdf", self.output_pdf)
+        if "text_path" in self.result:
+            self.store.put_file(key, "text", self.result["text_path"])
+        if self.alignment_path:
+            self.store.put_file(key, "alignment", self.alignment_path)
+        document = {name: self.result[name] for name in ("pages", "text", "characters", "words", "chunks",
+                                                         "pdf_pages", "translation_stats", "incremental")
+                    if name in self.result}
+        self.store.put_json(key, "result", document)
+
+    # driver ----------------------------------------------------------------
+
+    def _run_stage(self, name, target, out_q, *args):
+        try:
+            target(*args)
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            self._errors.append((name, e))
+            self._cancel.set()
+        finally:
+            if out_q is not None and not self._cancel.is_set():
+                try:
+                    self._put(out_q, DONE)
+                except PipelineCancelled:
+                    # Another stage failed while this one waited for queue space
+                    pass
+
+    def run(self) -> Iterator[dict]:
+        self.result = {"pdf_path": self.output_pdf,
+                       "cache": {"document": False, "stage": None, "chunks_reused": 0}}
+        if self.store is not None and self._load_artifacts():
+            return self.result
+        windows_q = queue.Queue(self.queue_size)
+        structured_q = queue.Queue(self.queue_size)
+        chunks_q = queue.Queue(self.queue_size)
+        translated_q = queue.Queue(self.queue_size)
+        self._queues = [windows_q, structured_q, chunks_q, translated_q]
+
+        stages = [
+            ("extract", self._extract_stage, windows_q, (windows_q,)),
+            ("structure", self._structure_stage, structured_q, (windows_q, structured_q)),
+            ("chunk", self._chunk_stage, chunks_q, (structured_q, chunks_q)),
+            ("translate", self._translate_stage, translated_q, (chunks_q, translated_q)),
+            ("render", self._render_stage, None, (translated_q,)),
+        ]
+        # Each stage runs in a copy of the caller's context so spans land on the caller's tracer
+        threads = [threading.Thread(target=contextvars.copy_context().run,
+                                    args=(self._run_stage, name, target, out_q) + args,
+                                    name=f"pipeline-{name}", daemon=True)
+                   for name, target, out_q, args in stages]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    yield self._events.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+            while not self._events.empty():
+                yield self._events.get_nowait()
+        finally:
+            # Closing the generator early (e.g. the UI was stopped) cancels the stages
+            self._cancel.set()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            stage, error = self._errors[0]
+            raise RuntimeError(f"{stage} stage failed: {error}") from error
+        if self.low_memory:
+            self.result["memory"] = self.guard.as_dict()
+        return self.result
+
+
+def run_pipeline(pdf_path, output_pdf, direction="en_to_hi", **kwargs):
+    """
+    Run the pipeline to completion and return its result dict.
+    """
+    pipeline = TranslationPipeline(pdf_path, output_pdf, direction, **kwargs)
+    for _ in pipeline.run():
+        pass
+    return pipeline.result
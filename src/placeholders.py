@@ -0,0 +1,133 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+ACRONYM_PATTERN = r"\b[A-Z]{2,}\b"
+# MarianMT sometimes changes spacing or case inside the brackets
+SENTINEL_PATTERN = re.compile(r"\[\s*[Pp]\s*(\d+)\s*\]")
+
+Glossary = Union[Mapping[str, str], Iterable[str]]
+
+
+def _term_pattern(term):
+    pattern = re.escape(term)
+    if re.match(r"\w", term):
+        pattern = r"\b" + pattern
+    if re.search(r"\w$", term):
+        pattern += r"\b"
+    return pattern
+
+
+class Protector:
+    """
+    Shields spans the model must not translate (acronyms and glossary terms)
+    behind compact sentinels: every distinct span in a text becomes "[P<n>]",
+    numbered from 0 in order of first appearance, in one regex pass.
+    `restore` puts them back with one pass over the translation.
+
+    A glossary is either a list of terms kept verbatim or a mapping from term
+    to the text that should appear in the translation (e.g. a product name's
+    official Hindi spelling). Longer terms win over shorter ones and over the
+    acronym rule.
+    """
+
+    def __init__(self, glossary: Optional[Glossary] = None, acronyms=True):
+        if glossary is None:
+            glossary = {}
+        elif not isinstance(glossary, Mapping):
+            glossary = {term: term for term in glossary}
+        self.glossary: Dict[str, str] = {term: value for term, value in glossary.items() if term}
+
+        alternatives = [_term_pattern(term) for term in sorted(self.glossary, key=len, reverse=True)]
+        if acronyms:
+            alternatives.append(ACRONYM_PATTERN)
+        # Sentinel look-alikes already in the source are protected too
+        alternatives.append(SENTINEL_PATTERN.pattern)
+        self._pattern = re.compile("|".join(alternatives))
+
+    def protect(self, text: str) -> Tuple[str, List[str]]:
+        """
+        Return the text with sentinels and the list of what each sentinel
+        stands for in the output.
+        """
+        spans = []
+        numbers = {}
+
+        def replace(match):
+            word = match.group(0)
+            if word not in numbers:
+                numbers[word] = len(spans)
+                spans.append(self.glossary.get(word, word))
+            return f"[P{numbers[word]}]"
+
+        return self._pattern.sub(replace, text), spans
+
+    @staticmethod
+    def restore(translated: str, spans: List[str]) -> str:
+        if not spans:
+            return translated
+
+        def replace(match):
+            index = int(match.group(1))
+            return spans[index] if index < len(spans) else match.group(0)
+
+        return SENTINEL_PATTERN.sub(replace, translated)
+
+
+def parse_glossary(text: str) -> Dict[str, str]:
+    """
+    One entry per line: "term" keeps the term as is, "term = translation"
+    replaces it. Blank lines and lines starting with # are ignored.
+    """
+    glossary = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        term, _, value = line.partition("=")
+        term = term.strip()
+        glossary[term] = value.strip() or term
+    return glossary
+
+
+def load_glossary(path: str) -> Dict[str, str]:
+    """
+    Read a glossary from a .json file (list of terms or term -> translation
+    object) or a text file in the `parse_glossary` format.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+            return dict(data) if isinstance(data, dict) else {term: term for term in data}
+        return parse_glossary(f.read())
+
+
+_default_protector = None
+_default_lock = threading.Lock()
+
+
+def default_protector() -> Protector:
+    """
+    Shared protector using the glossary file in GLOSSARY_PATH, if set.
+    """
+    global _default_protector
+    with _default_lock:
+        if _default_protector is None:
+            path = os.getenv("GLOSSARY_PATH")
+            _default_protector = Protector(load_glossary(path) if path else None)
+        return _default_protector
+
+
+def glossary_protector(glossary: Optional[Glossary] = None) -> Protector:
+    """
+    Protector for a per-request glossary on top of the GLOSSARY_PATH one;
+    request entries win. Without a glossary this is default_protector().
+    """
+    base = default_protector()
+    if not glossary:
+        return base
+    if not isinstance(glossary, Mapping):
+        glossary = {term: term for term in glossary}
+    return Protector({**base.glossary, **glossary})
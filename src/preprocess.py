@@ -1,51 +1,158 @@
-import fitz  
 import os
-from typing import List
+from typing import Iterable, Iterator, List
 import re
-import nltk
 from pathlib import Path
-nltk.download('punkt')
-from nltk.tokenize import sent_tokenize
+from src.punkt import sent_tokenize
+from src.placeholders import default_protector
+from src.pdf_extract import extract_text
+from src.instrumentation import span
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    doc = fitz.open(pdf_path)
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-    return full_text
+def extract_text_from_pdf(pdf_path: str, workers=None) -> str:
+    return extract_text(pdf_path, workers)
 
 def clean_text(text: str) -> str:
     text = re.sub(r"\s+", " ", text) 
     text = re.sub(r"\\n", " ", text)  
     return text.strip()
 
-def split_into_chunks(text: str, max_words=400) -> List[str]:
-    sentences = sent_tokenize(text)
-    chunks = []
+def iter_chunks(texts: Iterable[str], max_words=400) -> Iterator[str]:
+    """
+    Pack sentences from a stream of texts into chunks of at most `max_words`
+    words, yielding each chunk as soon as it is full.
+    """
     current_chunk = []
     current_length = 0
 
-    for sentence in sentences:
-        word_count = len(sentence.split())
+    for text in texts:
+        for sentence in sent_tokenize(text):
+            word_count = len(sentence.split())
+
+            if word_count > max_words:
+                words = sentence.split()
+                for i in range(0, len(words), max_words):
+                    yield " ".join(words[i:i+max_words])
+                continue
+
+            if current_length + word_count <= max_words:
+                current_chunk.append(sentence)
+                current_length += word_count
+            else:
+                yield " ".join(current_chunk)
+                current_chunk = [sentence]
+                current_length = word_count
+
+    if current_chunk:
+        yield " ".join(current_chunk)
+
+def split_into_chunks(text: str, max_words=400) -> List[str]:
+    return list(iter_chunks([text], max_words))
+
+# Clause boundaries, tried in order when a sentence is over the token limit
+CLAUSE_SPLITS = [
+    re.compile(r"(?<=[;:])\s+"),
+    re.compile(r"(?<=,)\s+"),
+    re.compile(r"\s+(?=(?:and|or|but|then|which|while|because|if|when)\b)"),
+]
+MAX_SENTENCE_TOKENS = 512
+CHUNK_TOKENS = 2048
+# Between the segments of a token-sized chunk; split_sentences treats single newlines as line wraps
+SEGMENT_SEPARATOR = "\n\n"
+
+def count_tokens(texts: List[str], tokenizer, protector=None) -> List[int]:
+    """
+    Subword token counts (including special tokens) for many texts at once.
+    With a protector the texts are counted as the model sees them, with
+    protected terms replaced by sentinels (which may take more tokens).
+    """
+    if not texts:
+        return []
+    if protector is not None:
+        texts = [protector.protect(text)[0] for text in texts]
+    return [len(ids) for ids in tokenizer(texts, truncation=False)["input_ids"]]
 
-        if word_count > max_words:
-            words = sentence.split()
-            for i in range(0, len(words), max_words):
-                chunks.append(" ".join(words[i:i+max_words]))
-            continue
+def _pack(pieces: List[str], counts: List[int], limit: int, overhead: int) -> List[str]:
+    # Greedily merge neighbouring pieces while the merged count stays under limit
+    packed = []
+    current = []
+    current_count = overhead
+    for piece, count in zip(pieces, counts):
+        count -= overhead
+        if current and current_count + count > limit:
+            packed.append(" ".join(current))
+            current = []
+            current_count = overhead
+        current.append(piece)
+        current_count += count
+    if current:
+        packed.append(" ".join(current))
+    return packed
 
-        if current_length + word_count <= max_words:
-            current_chunk.append(sentence)
-            current_length += word_count
+def split_to_token_limit(sentence: str, tokenizer, max_tokens: int, level=0, protector=None) -> List[str]:
+    """
+    Split an over-long sentence at clause boundaries (semicolons, commas,
+    conjunctions) so every piece fits in `max_tokens`, falling back to word
+    windows when no boundary is left.
+    """
+    overhead = count_tokens([""], tokenizer)[0]
+
+    if level < len(CLAUSE_SPLITS):
+        pieces = [p for p in CLAUSE_SPLITS[level].split(sentence) if p.strip()]
+        if len(pieces) == 1:
+            return split_to_token_limit(sentence, tokenizer, max_tokens, level + 1, protector)
+    else:
+        pieces = sentence.split()
+
+    counts = count_tokens(pieces, tokenizer, protector)
+    result = []
+    for piece in _pack(pieces, counts, max_tokens, overhead):
+        if level < len(CLAUSE_SPLITS) and count_tokens([piece], tokenizer, protector)[0] > max_tokens:
+            result.extend(split_to_token_limit(piece, tokenizer, max_tokens, level + 1, protector))
         else:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [sentence]
-            current_length = word_count
+            result.append(piece)
+    return result
+
+def iter_token_chunks(texts: Iterable[str], tokenizer, max_sentence_tokens=None, chunk_tokens=CHUNK_TOKENS,
+                      protector=None) -> Iterator[str]:
+    """
+    Chunk by MarianTokenizer subword tokens instead of words.
+
+    Sentences longer than the model limit are split at clause boundaries so
+    nothing is truncated at translation time, and chunks are filled up to
+    `chunk_tokens` (the per-batch token budget of the translation engine) so
+    each chunk makes full inference batches. Segments are separated by
+    blank lines so they are translated separately.
+
+    Tokens are counted after `protector` (default: default_protector(), as
+    in translate_texts) has replaced protected terms with sentinels.
+    """
+    max_sentence_tokens = max_sentence_tokens or min(tokenizer.model_max_length, MAX_SENTENCE_TOKENS)
+    protector = protector or default_protector()
+    current_chunk = []
+    current_tokens = 0
+
+    for text in texts:
+        sentences = sent_tokenize(text)
+        for sentence, count in zip(sentences, count_tokens(sentences, tokenizer, protector)):
+            if count <= max_sentence_tokens:
+                segments = [(sentence, count)]
+            else:
+                pieces = split_to_token_limit(sentence, tokenizer, max_sentence_tokens, protector=protector)
+                segments = list(zip(pieces, count_tokens(pieces, tokenizer, protector)))
+
+            for segment, segment_tokens in segments:
+                if current_chunk and current_tokens + segment_tokens > chunk_tokens:
+                    yield SEGMENT_SEPARATOR.join(current_chunk)
+                    current_chunk = []
+                    current_tokens = 0
+                current_chunk.append(segment)
+                current_tokens += segment_tokens
 
     if current_chunk:
-        chunks.append(" ".join(current_chunk))
+        yield SEGMENT_SEPARATOR.join(current_chunk)
 
-    return chunks
+def split_into_token_chunks(text: str, tokenizer, max_sentence_tokens=None, chunk_tokens=CHUNK_TOKENS,
+                            protector=None) -> List[str]:
+    return list(iter_token_chunks([text], tokenizer, max_sentence_tokens, chunk_tokens, protector))
 
 def save_chunks(chunks: List[str], output_dir: str):
     os.makedirs(output_dir, exist_ok=True)
@@ -53,9 +160,18 @@ def save_chunks(chunks: List[str], output_dir: str):
         with open(f"{output_dir}/chunk_{idx}.txt", "w", encoding="utf-8") as f:
             f.write(chunk)
 
-def preprocess_document(file_path: str, chunk_dir: str):
+def preprocess_document(file_path: str, chunk_dir: str, tokenizer=None):
+    """
+    Chunk a document into `chunk_dir`. With a tokenizer, chunks are sized in
+    subword tokens (see iter_token_chunks); otherwise by word count.
+    """
     raw_text = extract_text_from_pdf(file_path)
-    cleaned = clean_text(raw_text)
-    chunks = split_into_chunks(cleaned, max_words=800)
+    with span("chunk") as s:
+        cleaned = clean_text(raw_text)
+        if tokenizer is not None:
+            chunks = split_into_token_chunks(cleaned, tokenizer)
+        else:
+            chunks = split_into_chunks(cleaned, max_words=800)
+        s.add("chunks", len(chunks))
     save_chunks(chunks, chunk_dir)
     print(f"{len(chunks)} chunks saved to '{chunk_dir}'")
@@ -0,0 +1,61 @@
+import os
+import threading
+from typing import List
+
+# Local data directory searched before NLTK's default locations
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join(".cache", "nltk_data"))
+# nltk >= 3.8.2 loads punkt_tab; older releases load the pickled punkt model
+PUNKT_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab/english/",
+    "punkt": "tokenizers/punkt/english.pickle",
+}
+
+_lock = threading.Lock()
+_ready = False
+
+
+def _find(nltk):
+    for name, path in PUNKT_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+            return name
+        except LookupError:
+            continue
+    return None
+
+
+def ensure_punkt():
+    """
+    Make the punkt sentence tokenizer available, once per process.
+
+    The local cache (NLTK_DATA_DIR, default .cache/nltk_data) and NLTK's own
+    data paths are searched without touching the network. Only when punkt is
+    in none of them is it downloaded into the local cache, unless
+    NLTK_OFFLINE is set, in which case a LookupError explains what to install.
+    """
+    global _ready
+    if _ready:
+        return
+    with _lock:
+        if _ready:
+            return
+        import nltk
+        if NLTK_DATA_DIR not in nltk.data.path:
+            nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+        if _find(nltk) is None:
+            if os.getenv("NLTK_OFFLINE"):
+                raise LookupError(f"NLTK punkt data not found; run `python -m nltk.downloader -d {NLTK_DATA_DIR} "
+                                  f"punkt punkt_tab` or unset NLTK_OFFLINE")
+            os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+            for name in PUNKT_RESOURCES:
+                nltk.download(name, download_dir=NLTK_DATA_DIR, quiet=True)
+            if _find(nltk) is None:
+                raise LookupError("Could not download the NLTK punkt sentence tokenizer")
+        _ready = True
+
+
+def sent_tokenize(text: str) -> List[str]:
+    ensure_punkt()
+    from nltk.tokenize import sent_tokenize as nltk_sent_tokenize
+    return nltk_sent_tokenize(text)
@@ -0,0 +1,367 @@
+"""
+Local translation service: one process holds the models and serves
+translation requests over HTTP, batching texts from concurrent requests
+into shared `translate_texts` calls.
+
+    python -m src.service --port 8765 --warm-up en_to_hi
+
+    POST /translate  {"texts": [...], "direction": "en_to_hi", "profile": "fast", "glossary": {...}}
+                     -> NDJSON lines {"index": i, "translation": "..."} in order, then {"done": true}
+    GET  /health     -> {"status": "ok", ...}
+    GET  /stats      -> batching counters
+    GET  /metrics    -> per-stage timings in Prometheus text format
+
+Point the app, src.batch_cli and src.convert at it with
+TRANSLATION_SERVICE_URL=http://127.0.0.1:8765.
+"""
+import json
+import asyncio
+import argparse
+import itertools
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.model_registry import load_translation_model, registry
+from src.translation import translate_texts, TranslationSession, DEFAULT_BATCH_SIZE
+from src.translation_memory import get_translation_memory
+from src.placeholders import glossary_protector
+from src.decoding import get_profile
+from src.backends import BACKENDS, default_backend
+from src.instrumentation import process_tracer, span
+
+DEFAULT_PORT = 8765
+# How long the first text of a batch waits for texts from other requests
+DEFAULT_WINDOW_MS = 20
+DEFAULT_MAX_BATCH_TEXTS = 16
+# Texts accepted but not yet batched; request handlers wait beyond this
+DEFAULT_MAX_PENDING = 256
+# Requests served at once; more are turned away with 503
+DEFAULT_MAX_REQUESTS = 64
+MAX_BODY_BYTES = 64 * 2**20
+RETRY_AFTER_SECONDS = 5
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+               503: "Service Unavailable"}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _is_glossary(value):
+    if isinstance(value, dict):
+        value = [*value, *value.values()]
+    return isinstance(value, list) and all(isinstance(term, str) for term in value)
+
+
+class _Item:
+    def __init__(self, text, future):
+        self.text = text
+        self.future = future
+
+
+class MicroBatcher:
+    """
+    Collects texts from concurrent requests and translates them together.
+
+    Texts are grouped by (direction, profile, glossary), since those decide
+    the model and the protected terms. When a text arrives at an idle
+    batcher it waits `window_ms` for others to join; while a batch is being
+    translated, new texts simply queue up, so batches grow with the load.
+    Batches take texts round-robin across requests, so one large document
+    does not hold up small ones queued behind it.
+
+    `submit` waits while `max_pending` texts are queued, which pushes back
+    on request handlers and, through them, on clients.
+    """
+
+    def __init__(self, window_ms=DEFAULT_WINDOW_MS, max_batch_texts=DEFAULT_MAX_BATCH_TEXTS,
+                 max_pending=DEFAULT_MAX_PENDING, batch_size=DEFAULT_BATCH_SIZE, backend=None, memory=None):
+        self.window_seconds = window_ms / 1000
+        self.max_batch_texts = max_batch_texts
+        self.batch_size = batch_size
+        self.backend = backend
+        self.memory = memory if memory is not None else get_translation_memory()
+        self.stats = {"batches": 0, "texts": 0, "sentences": 0, "model_sentences": 0, "cross_request_batches": 0}
+        # key -> request id -> queued items
+        self._queues = OrderedDict()
+        self._pending = 0
+        self._capacity = asyncio.Semaphore(max_pending)
+        self._arrived = asyncio.Event()
+        # One batch at a time: the model already uses every core for a batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="service-batch")
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def submit(self, key, request_id, text):
+        await self._capacity.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, OrderedDict()).setdefault(request_id, deque()).append(_Item(text, future))
+        self._pending += 1
+        self._arrived.set()
+        return future
+
+    def _next_batch(self):
+        key = next(iter(self._queues))
+        requests = self._queues.pop(key)
+        items = []
+        request_ids = set()
+        while requests and len(items) < self.max_batch_texts:
+            for request_id in list(requests):
+                queued = requests[request_id]
+                item = queued.popleft()
+                self._pending -= 1
+                self._capacity.release()
+                # The client went away
+                if not item.future.cancelled():
+                    items.append(item)
+                    request_ids.add(request_id)
+                if queued:
+                    # Requests left out of a full batch go first next time
+                    requests.move_to_end(request_id)
+                else:
+                    del requests[request_id]
+                if len(items) == self.max_batch_texts:
+                    break
+        if requests:
+            # Other keys go first next time
+            self._queues[key] = requests
+        return key, items, len(request_ids)
+
+    def _translate(self, key, texts):
+        direction, profile, glossary = key
+        tokenizer, model = load_translation_model(direction, self.backend)
+        session = TranslationSession()
+        glossary = json.loads(glossary)
+        with span("service_batch", texts=len(texts)):
+            translations = translate_texts(texts, tokenizer, model, batch_size=self.batch_size, memory=self.memory,
+                                           direction=direction, protector=glossary_protector(glossary),
+                                           session=session, profile=profile)
+        return translations, session
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._arrived.clear()
+                await self._arrived.wait()
+                await asyncio.sleep(self.window_seconds)
+
+            key, items, requests = self._next_batch()
+            if not items:
+                continue
+            try:
+                translations, session = await loop.run_in_executor(self._executor, self._translate, key,
+                                                                   [item.text for item in items])
+            except Exception as e:
+                for item in items:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(items)
+            self.stats["sentences"] += session.sentences
+            self.stats["model_sentences"] += session.translated
+            self.stats["cross_request_batches"] += requests > 1
+            for item, translation in zip(items, translations):
+                if not item.future.done():
+                    item.future.set_result(translation)
+
+    def snapshot(self):
+        batches = self.stats["batches"]
+        return dict(self.stats, pending=self._pending,
+                    mean_batch_texts=round(self.stats["texts"] / batches, 2) if batches else 0.0)
+
+
+class TranslationService:
+    """
+    Minimal asyncio HTTP/1.1 server around a MicroBatcher, one request per
+    connection. Results are streamed as chunked NDJSON while later texts
+    of the same request are still queued or being translated.
+    """
+
+    def __init__(self, batcher, max_requests=DEFAULT_MAX_REQUESTS):
+        self.batcher = batcher
+        self.max_requests = max_requests
+        self.active = 0
+        self._ids = itertools.count()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"Translation service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, headers = await self._read_head(reader)
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                raise BadRequest("Invalid Content-Length")
+            if length < 0:
+                raise BadRequest("Invalid Content-Length")
+            if length > MAX_BODY_BYTES:
+                await self._send_json(writer, 413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"})
+                return
+            body = await reader.readexactly(length) if length else b""
+
+            if method == "GET" and path == "/health":
+                await self._send_json(writer, 200, {"status": "ok", "active_requests": self.active,
+                                                    "backend": self.batcher.backend or default_backend(),
+                                                    "models": [f"{d} ({b})" for d, b in registry.loaded()]})
+            elif method == "GET" and path == "/stats":
+                await self._send_json(writer, 200, dict(self.batcher.snapshot(), active_requests=self.active))
+            elif method == "GET" and path == "/metrics":
+                await self._send(writer, 200, "text/plain; version=0.0.4", process_tracer.to_prometheus().encode())
+            elif method == "POST" and path == "/translate":
+                await self._translate(writer, body)
+            else:
+                await self._send_json(writer, 404, {"error": f"No route for {method} {path}"})
+        except BadRequest as e:
+            await self._send_json(writer, 400, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_head(reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise BadRequest("Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return request_line[0], request_line[1].split("?")[0], headers
+
+    @staticmethod
+    def _parse_job(body):
+        try:
+            job = json.loads(body or b"{}")
+        except ValueError as e:
+            raise BadRequest(f"Invalid JSON: {e}")
+        if not isinstance(job, dict):
+            raise BadRequest("Body must be a JSON object")
+        texts = job.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise BadRequest("'texts' must be a list of strings")
+        direction = job.get("direction", "en_to_hi")
+        if direction not in ("en_to_hi", "hi_to_en"):
+            raise BadRequest(f"Unknown direction '{direction}'")
+        try:
+            profile = get_profile(job.get("profile")).name
+        except ValueError as e:
+            raise BadRequest(str(e))
+        glossary = job.get("glossary") or None
+        if glossary is not None and not _is_glossary(glossary):
+            raise BadRequest("'glossary' must be a list of terms or an object mapping terms to translations")
+        glossary = json.dumps(glossary, sort_keys=True, ensure_ascii=False)
+        return texts, (direction, profile, glossary)
+
+    async def _translate(self, writer, body):
+        texts, key = self._parse_job(body)
+        if self.active >= self.max_requests:
+            await self._send_json(writer, 503, {"error": f"{self.active} requests in progress, try again shortly"},
+                                  extra_headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+            return
+
+        self.active += 1
+        request_id = next(self._ids)
+        futures = asyncio.Queue()
+
+        async def enqueue():
+            for text in texts:
+                await futures.put(await self.batcher.submit(key, request_id, text))
+
+        feeder = asyncio.ensure_future(enqueue())
+        try:
+            await self._send_head(writer, 200, "application/x-ndjson", chunked=True)
+            for index in range(len(texts)):
+                future = await futures.get()
+                try:
+                    line = {"index": index, "translation": await future}
+                except Exception as e:
+                    await self._write_chunk(writer, json.dumps({"error": str(e)}).encode() + b"\n")
+                    break
+                await self._write_chunk(writer, json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n")
+            else:
+                await self._write_chunk(writer, json.dumps({"done": True, "count": len(texts)}).encode() + b"\n")
+            await self._write_chunk(writer, b"")
+        finally:
+            self.active -= 1
+            feeder.cancel()
+            # Texts of a client that went away are dropped when their batch is formed
+            while not futures.empty():
+                futures.get_nowait().cancel()
+
+    # response helpers ------------------------------------------------------
+
+    @staticmethod
+    async def _send_head(writer, status, content_type, length=None, chunked=False, extra_headers=None):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}", f"Content-Type: {content_type}", "Connection: close"]
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+        elif length is not None:
+            lines.append(f"Content-Length: {length}")
+        lines += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    @staticmethod
+    async def _write_chunk(writer, data):
+        writer.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        # Waits while the client is not reading, so a slow reader holds back only its own request
+        await writer.drain()
+
+    async def _send(self, writer, status, content_type, data, extra_headers=None):
+        await self._send_head(writer, status, content_type, len(data), extra_headers=extra_headers)
+        writer.write(data)
+        await writer.drain()
+
+    async def _send_json(self, writer, status, value, extra_headers=None):
+        await self._send(writer, status, "application/json", json.dumps(value, ensure_ascii=False).encode("utf-8"),
+                         extra_headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS,
+                        help="How long a batch waits for texts from other requests")
+    parser.add_argument("--max-batch-texts", type=int, default=DEFAULT_MAX_BATCH_TEXTS)
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Queued texts before request handlers have to wait")
+    parser.add_argument("--max-requests", type=int, default=DEFAULT_MAX_REQUESTS,
+                        help="Requests served at once before answering 503")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Max sentences per generate() call")
+    parser.add_argument("--backend", choices=BACKENDS, default=None)
+    parser.add_argument("--warm-up", nargs="*", default=[], choices=["en_to_hi", "hi_to_en"],
+                        help="Directions to load before accepting requests")
+    args = parser.parse_args()
+
+    for direction in args.warm_up:
+        load_translation_model(direction, args.backend)
+
+    async def run():
+        batcher = MicroBatcher(args.window_ms, args.max_batch_texts, args.max_pending, args.batch_size,
+                               args.backend)
+        await TranslationService(batcher, args.max_requests).serve(args.host, args.port)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
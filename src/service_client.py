@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import urllib.error
+import urllib.request
+from typing import Iterator, List, Optional, Tuple
+
+DEFAULT_TIMEOUT = 600
+DEFAULT_RETRIES = 5
+
+
+class ServiceError(Exception):
+    pass
+
+
+class ServiceClient:
+    """
+    Client for the translation service in src/service.py. Translations are
+    read from the NDJSON stream as the service finishes them; a busy
+    service (503) is retried after the delay it asks for.
+    """
+
+    def __init__(self, url, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self._backend = None
+
+    def _open(self, request):
+        for attempt in range(self.retries + 1):
+            try:
+                return urllib.request.urlopen(request, timeout=self.timeout)
+            except urllib.error.HTTPError as e:
+                try:
+                    message = json.loads(e.read().decode("utf-8")).get("error", e.reason)
+                except ValueError:
+                    message = e.reason
+                if e.code != 503 or attempt == self.retries:
+                    raise ServiceError(f"Translation service answered {e.code}: {message}") from e
+                time.sleep(float(e.headers.get("Retry-After", 2 ** attempt)))
+            except urllib.error.URLError as e:
+                raise ServiceError(f"Translation service at {self.url} is unreachable: {e.reason}") from e
+
+    def iter_translate(self, texts, direction="en_to_hi", profile=None, glossary=None) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (index, translation) pairs in input order as they arrive.
+        """
+        body = json.dumps({"texts": list(texts), "direction": direction, "profile": profile, "glossary": glossary},
+                          ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(f"{self.url}/translate", data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with self._open(request) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                item = json.loads(line.decode("utf-8"))
+                if "error" in item:
+                    raise ServiceError(f"Translation service failed: {item['error']}")
+                if item.get("done"):
+                    return
+                yield item["index"], item["translation"]
+        raise ServiceError("Translation service closed the connection before all translations arrived")
+
+    def translate(self, texts, direction="en_to_hi", profile=None, glossary=None) -> List[str]:
+        results = [None] * len(texts)
+        for index, translation in self.iter_translate(texts, direction, profile, glossary):
+            results[index] = translation
+        return results
+
+    def _get_json(self, path):
+        with self._open(urllib.request.Request(f"{self.url}{path}")) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def health(self):
+        return self._get_json("/health")
+
+    def backend(self):
+        """
+        Inference backend of the service, which cached translations depend on.
+        """
+        if self._backend is None:
+            self._backend = self.health().get("backend") or "unknown"
+        return self._backend
+
+    def stats(self):
+        return self._get_json("/stats")
+
+
+def get_service_client() -> Optional[ServiceClient]:
+    """
+    Client for TRANSLATION_SERVICE_URL, or None to translate in-process.
+    """
+    url = os.getenv("TRANSLATION_SERVICE_URL")
+    return ServiceClient(url) if url else None
@@ -0,0 +1,237 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Sequence
+from src.instrumentation import span
+from src.placeholders import default_protector
+from src.decoding import get_profile
+from src.punkt import sent_tokenize
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_TOKENS = 2048
+
+# Segments copied to the output as they are: URLs, e-mail addresses and
+# version codes (V1.0, v2.3.1); anything without letters is copied as well
+PASSTHROUGH = re.compile(r"(https?://\S+|www\.\S+|[\w.+-]+@[\w-]+\.[\w.]+|[vV]\d+(\.\d+)*)[.,;:]?")
+LETTER = re.compile(r"[^\W\d_]")
+SENTINEL = re.compile(r"\[P\d+\]")
+# Blank lines separate segments; single newlines are soft line wraps
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def normalize_sentence(sentence: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", sentence).split())
+
+
+def is_untranslatable(sentence: str) -> bool:
+    """
+    True for segments the model has nothing to do with: no letters outside
+    sentinels (numbers, dates, separator lines, codes made of acronyms) or a
+    URL / e-mail / version code on its own.
+    """
+    text = SENTINEL.sub(" ", sentence)
+    return not LETTER.search(text) or all(PASSTHROUGH.fullmatch(word) for word in text.split())
+
+
+class TranslationSession:
+    """
+    State shared by the translate_texts calls of one document: translations
+    of sentences already seen (so repeated headers, footers and table rows
+    reach the model once) and counters of what happened to each sentence.
+
+    `max_seen` caps the sentences kept for deduplication; the least
+    recently used ones are forgotten first. None keeps every sentence.
+    """
+
+    def __init__(self, max_seen=None):
+        self.seen = OrderedDict()
+        self.max_seen = max_seen
+        self.sentences = 0
+        self.duplicates = 0
+        self.passthrough = 0
+        self.memory_hits = 0
+        self.translated = 0
+        self._lock = threading.Lock()
+
+    def count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def remember(self, translations):
+        with self._lock:
+            for sentence, translation in translations.items():
+                self.seen[sentence] = translation
+                self.seen.move_to_end(sentence)
+            while self.max_seen is not None and len(self.seen) > self.max_seen:
+                self.seen.popitem(last=False)
+
+    @property
+    def saved(self):
+        """
+        Sentences that did not need a model call.
+        """
+        return self.sentences - self.translated
+
+    def as_dict(self):
+        return {
+            "sentences": self.sentences,
+            "duplicates": self.duplicates,
+            "passthrough": self.passthrough,
+            "memory_hits": self.memory_hits,
+            "translated": self.translated,
+            "saved": self.saved,
+        }
+
+
+def split_sentences(text: str) -> List[str]:
+    # Paragraphs are translated separately (token-sized chunks put a blank line
+    # between segments); lines wrapped inside a paragraph are joined first
+    return [sentence for paragraph in PARAGRAPH_BREAK.split(text)
+            for sentence in sent_tokenize(" ".join(paragraph.split()))]
+
+
+def make_batches(lengths: Sequence[int], batch_size=DEFAULT_BATCH_SIZE, max_tokens=DEFAULT_MAX_TOKENS) -> List[List[int]]:
+    """
+    Group sentence indices into length-sorted batches.
+
+    A batch is closed when it holds `batch_size` sentences or when its padded
+    size (longest sentence * number of sentences) would exceed `max_tokens`.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current = []
+    longest = 0
+
+    for idx in order:
+        length = lengths[idx]
+        padded = max(longest, length) * (len(current) + 1)
+        if current and (len(current) >= batch_size or padded > max_tokens):
+            batches.append(current)
+            current = []
+            longest = 0
+        current.append(idx)
+        longest = max(longest, length)
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def translate_batch(sentences: Sequence[str], tokenizer, model, batch_size=DEFAULT_BATCH_SIZE, max_tokens=DEFAULT_MAX_TOKENS,
+                    profile=None) -> List[str]:
+    """
+    Translate sentences in padded, length-sorted batches and return the
+    translations in the original order. `profile` is a decoding profile
+    name or DecodingProfile (see src/decoding.py).
+    """
+    if not sentences:
+        return []
+
+    profile = get_profile(profile)
+    with span("translate.generate", sentences=len(sentences)) as s:
+        lengths = [len(ids) for ids in tokenizer(list(sentences), truncation=True)["input_ids"]]
+        s.add("tokens", sum(lengths))
+        results = [None] * len(sentences)
+
+        for batch in make_batches(lengths, batch_size, max_tokens):
+            inputs = tokenizer([sentences[i] for i in batch], return_tensors="pt", truncation=True, padding=True)
+            outputs = model.generate(**inputs, **profile.generate_kwargs(max(lengths[i] for i in batch)))
+            decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            for idx, translated in zip(batch, decoded):
+                results[idx] = translated
+            s.add("batches")
+
+    return results
+
+
+def _translate_with_memory(sentences, tokenizer, model, batch_size, max_tokens, memory, direction, profile):
+    # Greedy translations must not answer for beam-search requests
+    model_name = f"{getattr(model, 'name_or_path', '')}@{profile.name}"
+    keys = [memory.make_key(direction, model_name, s) for s in sentences]
+    found = memory.get_many(keys)
+
+    missing = [i for i, key in enumerate(keys) if key not in found]
+    translated = translate_batch([sentences[i] for i in missing], tokenizer, model, batch_size, max_tokens, profile)
+    memory.put_many({keys[i]: t for i, t in zip(missing, translated)})
+
+    results = [found.get(key) for key in keys]
+    for i, t in zip(missing, translated):
+        results[i] = t
+    return results, len(missing)
+
+
+def translate_texts(texts: Sequence[str], tokenizer, model, batch_size=DEFAULT_BATCH_SIZE, max_tokens=DEFAULT_MAX_TOKENS,
+                    memory=None, direction=None, protector=None, session=None, profile=None) -> List[str]:
+    """
+    Translate several texts (e.g. all chunks of a document) at once.
+
+    Sentences from every text are pooled into shared batches so short chunks
+    do not produce half-empty forward passes. When a TranslationMemory is
+    given, only sentences it doesn't already hold go to the model.
+    Acronyms and glossary terms are swapped for sentinels per sentence by
+    `protector` (default: src.placeholders.default_protector()), so repeated
+    sentences stay identical for the memory.
+
+    Sentences are NFKC / whitespace normalized and each distinct one is
+    translated once; segments without translatable text are copied as they
+    are. Pass the same TranslationSession to every call for one document
+    to deduplicate across calls and collect the counts.
+    """
+    protector = protector or default_protector()
+    profile = get_profile(profile)
+    session = session or TranslationSession()
+    with span("translate", chunks=len(texts)) as s:
+        sentences = []
+        preserved = []
+        bounds = []
+        for text in texts:
+            start = len(sentences)
+            for sentence in split_sentences(text):
+                protected, spans = protector.protect(normalize_sentence(sentence))
+                sentences.append(protected)
+                preserved.append(spans)
+            bounds.append((start, len(sentences)))
+
+        pending = []
+        found = {}
+        duplicates = passthrough = 0
+        for sentence in sentences:
+            if sentence in found:
+                duplicates += 1
+            elif sentence in session.seen:
+                found[sentence] = session.seen[sentence]
+                duplicates += 1
+            elif is_untranslatable(sentence):
+                found[sentence] = sentence
+                passthrough += 1
+            else:
+                # Claimed now so later occurrences in this call count as duplicates
+                found[sentence] = None
+                pending.append(sentence)
+
+        if memory is not None:
+            translated, model_sentences = _translate_with_memory(pending, tokenizer, model, batch_size,
+                                                                 max_tokens, memory, direction, profile)
+        else:
+            translated = translate_batch(pending, tokenizer, model, batch_size, max_tokens, profile)
+            model_sentences = len(pending)
+        found.update(zip(pending, translated))
+        session.remember(found)
+
+        session.count(sentences=len(sentences), duplicates=duplicates, passthrough=passthrough,
+                      memory_hits=len(pending) - model_sentences, translated=model_sentences)
+        s.add("sentences", len(sentences))
+        s.add("model_sentences", model_sentences)
+
+        restored = [protector.restore(found[t], spans) for t, spans in zip(sentences, preserved)]
+        results = ["\n".join(restored[start:end]) for start, end in bounds]
+    return results
+
+
+def intelligent_translate(text, tokenizer, model, batch_size=DEFAULT_BATCH_SIZE, max_tokens=DEFAULT_MAX_TOKENS,
+                          memory=None, direction=None, protector=None, session=None, profile=None):
+    return translate_texts([text], tokenizer, model, batch_size, max_tokens, memory=memory, direction=direction,
+                           protector=protector, session=session, profile=profile)[0]
@@ -0,0 +1,129 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_MEMORY_PATH = "translation_memory.sqlite3"
+DEFAULT_MAX_ENTRIES = 200_000
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+class TranslationMemory:
+    """
+    Disk-backed sentence translation cache.
+
+    Entries are keyed by a hash of (direction, model name, sentence), where the
+    sentence is the exact text sent to the model (after acronyms and glossary terms are replaced by sentinels).
+    The table is kept below `max_entries` by dropping the least recently used
+    rows.
+    """
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            " key TEXT PRIMARY KEY,"
+            " translation TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(direction, model_name, sentence):
+        raw = "\x1f".join((direction or "", model_name or "", sentence))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Return {key: translation} for the keys that are present and mark them
+        as recently used.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[i:i + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM memory WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE memory SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO memory (key, translation, last_used) VALUES (?, ?, ?)",
+                [(key, translation, now) for key, translation in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if not self.max_entries:
+            return
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM memory WHERE key IN (SELECT key FROM memory ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()
+        return count
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_memory = None
+_default_lock = threading.Lock()
+
+
+def get_translation_memory():
+    """
+    Shared memory configured from TRANSLATION_MEMORY_PATH and
+    TRANSLATION_MEMORY_MAX_ENTRIES. Set TRANSLATION_MEMORY_PATH to an empty
+    string to disable it (returns None).
+    """
+    global _default_memory
+    path = os.getenv("TRANSLATION_MEMORY_PATH", DEFAULT_MEMORY_PATH)
+    if not path:
+        return None
+    with _default_lock:
+        if _default_memory is None:
+            max_entries = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+            _default_memory = TranslationMemory(path, max_entries=max_entries)
+        return _default_memory
@@ -4,125 +4,192 @@ from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfutils
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
+import io
 import sys
 import os
+import shutil
+import tempfile
+import threading
+from src.pdf_layout import wrap_line, lines_per_page
+from src.instrumentation import span
+
+HINDI_FONTS = [
+    'C:/Windows/Fonts/mangal.ttf',
+    'C:/Windows/Fonts/kokila.ttf',
+    'C:/Windows/Fonts/aparaj.ttf',
+    'C:/Windows/Fonts/nirmala.ttf',
+    'C:/Windows/Fonts/utsaah.ttf',
+]
+
+_font_lock = threading.Lock()
+_font_name = None
+
+def register_hindi_font():
+    """
+    Register the first available Hindi font and return the font name to use.
+    Falls back to Helvetica when none is found. Registration happens once per
+    process; later calls return the cached name.
+    """
+    global _font_name
+    with _font_lock:
+        if _font_name is None:
+            _font_name = _find_and_register_font()
+        return _font_name
+
+def _find_and_register_font():
+    try:
+        for font_path in HINDI_FONTS:
+            if os.path.exists(font_path):
+                try:
+                    pdfmetrics.registerFont(TTFont('HindiFont', font_path))
+                    print(f"Using font: {font_path}")
+                    return 'HindiFont'
+                except:
+                    continue
+
+        print("Warning: No Hindi font found. Using default font (may not display Hindi properly)")
+    except:
+        print("Warning: Font registration failed. Using default font")
+    return 'Helvetica'
+
+class PdfTextWriter:
+    """
+    Incrementally lay out lines of text onto letter-size pages.
+
+    Lines can be written as they become available. They are wrapped with
+    cached word widths and collected per page; each full page is drawn as a
+    single text object, and `close()` finishes the document. `output` is a
+    file path or a binary file object such as io.BytesIO.
+
+    A canvas keeps every page in memory until it is saved. With
+    `pages_per_part` and a path as `output`, every that many pages are saved
+    to a separate PDF on disk and `close()` merges the parts into `output`.
+    """
+
+    def __init__(self, output, font_size=12, line_height=14, margin=72, pages_per_part=None):
+        self.output = output
+        self.pages_per_part = pages_per_part if isinstance(output, str) else None
+        self._parts = []
+        self._tmp_dir = tempfile.mkdtemp(prefix="pdf_parts_") if self.pages_per_part else None
+        self.c = self._new_canvas()
+        self.width, self.height = letter
+        self.font_name = register_hindi_font()
+        self.font_size = font_size
+
+        self.margin_left = margin
+        self.margin_right = margin
+        self.margin_top = margin
+        self.margin_bottom = margin
+
+        self.line_height = line_height
+        self.max_width = self.width - self.margin_left - self.margin_right
+        self.lines_per_page = lines_per_page(self.height, self.margin_top, self.margin_bottom, line_height)
+
+        self._page_lines = []
+        self._finished_pages = 0
+
+    @property
+    def pages(self):
+        return self._finished_pages + (1 if self._page_lines else 0)
+
+    def _new_canvas(self):
+        if self._tmp_dir is None:
+            return canvas.Canvas(self.output, pagesize=letter)
+        self._parts.append(os.path.join(self._tmp_dir, f"{len(self._parts)}.pdf"))
+        return canvas.Canvas(self._parts[-1], pagesize=letter)
+
+    def _flush_page(self):
+        if not self._page_lines:
+            return
+        if self._finished_pages and self.pages_per_part and self._finished_pages % self.pages_per_part == 0:
+            self.c.save()
+            self.c = self._new_canvas()
+        elif self._finished_pages:
+            self.c.showPage()
+
+        text = self.c.beginText(self.margin_left, self.height - self.margin_top)
+        text.setFont(self.font_name, self.font_size, leading=self.line_height)
+        for line in self._page_lines:
+            text.textLine(line)
+        self.c.drawText(text)
+
+        self._page_lines = []
+        self._finished_pages += 1
+
+    def write_line(self, line):
+        for piece in wrap_line(line, self.font_name, self.font_size, self.max_width):
+            self._page_lines.append(piece)
+            if len(self._page_lines) == self.lines_per_page:
+                self._flush_page()
+
+    def write_text(self, text):
+        for line in text.split('\n'):
+            self.write_line(line)
+
+    def close(self):
+        self._flush_page()
+        self.c.save()
+        if self._tmp_dir is None:
+            return
+        try:
+            if len(self._parts) == 1:
+                shutil.move(self._parts[0], self.output)
+            else:
+                import fitz
+                with fitz.open() as merged:
+                    for part in self._parts:
+                        with fitz.open(part) as doc:
+                            merged.insert_pdf(doc)
+                    merged.save(self.output, garbage=3, deflate=True)
+        finally:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+def render_pdf(source, output=None):
+    """
+    Render text to PDF in-process.
+
+    Args:
+        source: The full text as a string, or an iterable of lines
+        output: File path or binary file object; a new BytesIO when omitted
+
+    Returns:
+        The output that was written to (the BytesIO when one was created)
+    """
+    if output is None:
+        output = io.BytesIO()
+
+    with span("render") as s:
+        writer = PdfTextWriter(output)
+        if isinstance(source, str):
+            writer.write_text(source)
+        else:
+            for line in source:
+                writer.write_text(line.rstrip('\n'))
+        writer.close()
+        s.add("pages", writer.pages)
+
+    if hasattr(output, 'seek'):
+        output.seek(0)
+    return output
 
 def txt_to_pdf(txt_file_path, pdf_file_path=None):
     """
     Convert a text file to PDF format.
-    
+
     Args:
         txt_file_path (str): Path to the input .txt file
         pdf_file_path (str): Path for output .pdf file (optional)
     """
-    
+
     if pdf_file_path is None:
         base_name = os.path.splitext(txt_file_path)[0]
         pdf_file_path = base_name + '.pdf'
-    
+
     try:
         with open(txt_file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        c = canvas.Canvas(pdf_file_path, pagesize=letter)
-        width, height = letter
-        
-        try:
-            hindi_fonts = [
-                'C:/Windows/Fonts/mangal.ttf',      
-                'C:/Windows/Fonts/kokila.ttf',        
-                'C:/Windows/Fonts/aparaj.ttf',      
-                'C:/Windows/Fonts/nirmala.ttf',     
-                'C:/Windows/Fonts/utsaah.ttf',      
-            ]
-            
-            font_registered = False
-            for font_path in hindi_fonts:
-                if os.path.exists(font_path):
-                    try:
-                        pdfmetrics.registerFont(TTFont('HindiFont', font_path))
-                        c.setFont('HindiFont', 12)
-                        font_registered = True
-                        print(f"Using font: {font_path}")
-                        break
-                    except:
-                        continue
-            
-            if not font_registered:
-                print("Warning: No Hindi font found. Using default font (may not display Hindi properly)")
-                c.setFont('Helvetica', 12)
-        except:
-            print("Warning: Font registration failed. Using default font")
-            c.setFont('Helvetica', 12)
-        
-        margin_left = 72  
-        margin_right = 72  
-        margin_top = 72   
-        margin_bottom = 72  
-        
-        y_position = height - margin_top
-        line_height = 14
-        max_width = width - margin_left - margin_right
-        
-        lines = content.split('\n')
-        
-        for line in lines:
-            if c.stringWidth(line) > max_width:
-                words = line.split(' ')
-                current_line = ""
-                
-                for word in words:
-                    test_line = current_line + " " + word if current_line else word
-                    try:
-                        test_width = c.stringWidth(test_line)
-                    except:
-                        test_width = len(test_line) * 7  
-                    
-                    if test_width <= max_width:
-                        current_line = test_line
-                    else:
-                        if current_line:
-                            try:
-                                c.drawString(margin_left, y_position, current_line)
-                            except:
-                                c.drawString(margin_left, y_position, current_line.encode('utf-8', errors='ignore').decode('utf-8'))
-                            y_position -= line_height
-                            
-                            if y_position < margin_bottom:
-                                c.showPage()
-                                if 'font_registered' in locals() and font_registered:
-                                    c.setFont('HindiFont', 12)
-                                else:
-                                    c.setFont('Helvetica', 12)
-                                y_position = height - margin_top
-                        
-                        current_line = word
-                
-                if current_line:
-                    try:
-                        c.drawString(margin_left, y_position, current_line)
-                    except:
-                        c.drawString(margin_left, y_position, current_line.encode('utf-8', errors='ignore').decode('utf-8'))
-                    y_position -= line_height
-            else:
-    
-                try:
-                    c.drawString(margin_left, y_position, line)
-                except:
-                    c.drawString(margin_left, y_position, line.encode('utf-8', errors='ignore').decode('utf-8'))
-                y_position -= line_height
-        
-            if y_position < margin_bottom:
-                c.showPage()
-                if 'font_registered' in locals() and font_registered:
-                    c.setFont('HindiFont', 12)
-                else:
-                    c.setFont('Helvetica', 12)
-                y_position = height - margin_top
-    
-        c.save()
+            render_pdf(file, pdf_file_path)
         print(f"Successfully converted '{txt_file_path}' to '{pdf_file_path}'")
-        
+
     except FileNotFoundError:
         print(f"Error: File '{txt_file_path}' not found.")
     except Exception as e:
@@ -130,10 +197,10 @@ def txt_to_pdf(txt_file_path, pdf_file_path=None):
 
 def main():
     """Main function to handle command line usage"""
-    
+
     input_file = "translated_output.txt"
     output_file = "final.pdf"
-    
+
     txt_to_pdf(input_file, output_file)
 
 if __name__ == "__main__":
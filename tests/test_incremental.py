@@ -0,0 +1,103 @@
+import re
+import json
+
+import pytest
+
+import src.placeholders
+import src.translation
+from src.incremental import (Alignment, AlignmentWriter, IncrementalTranslator, align_chunk, alignment_header,
+                             check_alignment, diff_sentences, parse_alignment)
+
+
+@pytest.fixture
+def simple_sentences(monkeypatch):
+    """
+    Split sentences after ". " instead of loading punkt.
+    """
+    monkeypatch.setattr(src.translation, "sent_tokenize", lambda text: re.split(r"(?<=\.) ", text) if text else [])
+
+
+def pairs(*sources):
+    return [(source, source.upper()) for source in sources]
+
+
+def test_diff_of_identical_versions_reuses_everything():
+    reused, counts = diff_sentences(pairs("A.", "B.", "C."), ["A.", "B.", "C."])
+    assert reused == ["A.", "B.", "C."]
+    assert counts == {"unchanged": 3, "moved": 0, "changed": 0, "inserted": 0, "removed": 0}
+
+
+def test_diff_counts_changed_inserted_and_removed():
+    previous = pairs("A.", "B.", "C.", "D.", "E.")
+    reused, counts = diff_sentences(previous, ["A.", "B2.", "C.", "X.", "E."])
+    assert reused == ["A.", None, "C.", None, "E."]
+    assert counts == {"unchanged": 3, "moved": 0, "changed": 2, "inserted": 0, "removed": 2}
+
+    reused, counts = diff_sentences(previous, ["A.", "B.", "New.", "C.", "D.", "E."])
+    assert reused == ["A.", "B.", None, "C.", "D.", "E."]
+    assert counts == {"unchanged": 5, "moved": 0, "changed": 0, "inserted": 1, "removed": 0}
+
+    reused, counts = diff_sentences(previous, ["A.", "E."])
+    assert reused == ["A.", "E."]
+    assert counts == {"unchanged": 2, "moved": 0, "changed": 0, "inserted": 0, "removed": 3}
+
+
+def test_diff_reuses_moved_sentences():
+    reused, counts = diff_sentences(pairs("A.", "B.", "C.", "D."), ["A.", "D.", "B.", "C."])
+    assert reused == ["A.", "D.", "B.", "C."]
+    assert counts["moved"] == 1
+    assert counts["unchanged"] == 3
+
+
+def test_translator_only_sends_new_sentences(simple_sentences):
+    translator = IncrementalTranslator(pairs("One.", "Two.", "Three."))
+    sent = []
+
+    def translate(sentences):
+        sent.extend(sentences)
+        return [f"<{sentence}>" for sentence in sentences]
+
+    chunks, new_pairs, report = translator.translate(["One. Two.", "Four. Three."], translate)
+    assert sent == ["Four."]
+    assert chunks == ["ONE.\nTWO.", "<Four.>\nTHREE."]
+    assert new_pairs == [("One.", "ONE."), ("Two.", "TWO."), ("Four.", "<Four.>"), ("Three.", "THREE.")]
+    assert report["translated"] == 1
+    assert report["reused"] == 3
+
+
+def test_align_chunk_keeps_a_mismatched_chunk_whole(simple_sentences):
+    assert align_chunk("One. Two.", "Ek.\nDo.") == [("One.", "Ek."), ("Two.", "Do.")]
+    assert align_chunk("One. Two.", "Ek do.") == [("One. Two.", "Ek do.")]
+
+
+def test_alignment_round_trip_keeps_header(tmp_path):
+    path = tmp_path / "alignment.jsonl"
+    header = {"direction": "en_to_hi", "model": "m", "profile": "fast", "glossary": "0"}
+    writer = AlignmentWriter(str(path), header)
+    writer.write([("One.", "Ek."), ("Two.", "Do.")])
+    writer.close()
+
+    alignment = parse_alignment(path.read_text(encoding="utf-8"))
+    assert list(alignment) == [("One.", "Ek."), ("Two.", "Do.")]
+    assert alignment.header == header
+    check_alignment(alignment, header)
+    with pytest.raises(ValueError, match="profile"):
+        check_alignment(alignment, dict(header, profile="quality"))
+
+
+def test_alignment_without_header_is_accepted():
+    alignment = parse_alignment(json.dumps([["One.", "Ek."]]))
+    assert alignment == Alignment([("One.", "Ek.")])
+    assert alignment.header is None
+    check_alignment(alignment, {"direction": "hi_to_en"})
+
+
+def test_header_follows_the_glossary_path_glossary(tmp_path, monkeypatch):
+    path = tmp_path / "glossary.txt"
+    monkeypatch.setenv("GLOSSARY_PATH", str(path))
+    headers = []
+    for terms in ("QualiSoft\n", "QualiSoft\nSOP\n"):
+        path.write_text(terms, encoding="utf-8")
+        monkeypatch.setattr(src.placeholders, "_default_protector", None)
+        headers.append(alignment_header("en_to_hi", "fast", {"Acme": "Acme"}))
+    assert headers[0]["glossary"] != headers[1]["glossary"]
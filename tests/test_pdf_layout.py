@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("reportlab")
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from src.pdf_layout import wrap_line
+
+FONT = "Helvetica"
+SIZE = 10
+
+
+def test_short_line_is_kept_whole():
+    assert wrap_line("one two three", FONT, SIZE, 1000) == ["one two three"]
+
+
+def test_pieces_fit_and_keep_every_word():
+    line = " ".join(f"word{i}" for i in range(40))
+    pieces = wrap_line(line, FONT, SIZE, 120)
+    assert len(pieces) > 1
+    assert all(stringWidth(piece, FONT, SIZE) <= 120 for piece in pieces)
+    assert " ".join(pieces) == line
+
+
+def test_matches_measuring_the_whole_line():
+    line = "The quick brown fox jumps over the lazy dog " * 5
+    pieces = wrap_line(line.strip(), FONT, SIZE, 150)
+    for piece, following in zip(pieces, pieces[1:]):
+        # The next word would not have fitted on this piece
+        assert stringWidth(f"{piece} {following.split(' ')[0]}", FONT, SIZE) > 150
+
+
+def test_overlong_word_gets_its_own_line():
+    assert wrap_line("a " + "x" * 200 + " b", FONT, SIZE, 50) == ["a", "x" * 200, "b"]
+
+
+def test_empty_line():
+    assert wrap_line("", FONT, SIZE, 100) == [""]
@@ -0,0 +1,57 @@
+import pytest
+
+import src.placeholders as placeholders
+from src.placeholders import Protector, glossary_protector, parse_glossary
+
+
+def test_sentinels_round_trip():
+    protector = Protector(["QualiSoft"])
+    protected, spans = protector.protect("QualiSoft follows the SOP. The SOP names QualiSoft.")
+    assert protected == "[P0] follows the [P1]. The [P1] names [P0]."
+    assert spans == ["QualiSoft", "SOP"]
+    assert Protector.restore(protected, spans) == "QualiSoft follows the SOP. The SOP names QualiSoft."
+
+
+def test_restore_tolerates_model_spacing_and_case():
+    assert Protector.restore("[ p0 ] और [P 1]", ["NASA", "ISRO"]) == "NASA और ISRO"
+    # Sentinels the model invented are left as they are
+    assert Protector.restore("[P5]", ["NASA"]) == "[P5]"
+
+
+def test_glossary_mapping_replaces_and_longest_term_wins():
+    protector = Protector({"SOP": "मानक संचालन प्रक्रिया", "SOP Manual": "एसओपी पुस्तिका"})
+    protected, spans = protector.protect("Read the SOP Manual and the SOP.")
+    assert protected == "Read the [P0] and the [P1]."
+    assert spans == ["एसओपी पुस्तिका", "मानक संचालन प्रक्रिया"]
+
+
+def test_terms_match_whole_words_only():
+    protected, spans = Protector(["cat"], acronyms=False).protect("cat catalog")
+    assert protected == "[P0] catalog"
+    assert spans == ["cat"]
+
+
+def test_sentinel_look_alikes_in_the_source_survive():
+    protector = Protector(acronyms=False)
+    protected, spans = protector.protect("Step [P3] of 4")
+    assert Protector.restore(protected, spans) == "Step [P3] of 4"
+
+
+def test_parse_glossary():
+    text = "# comment\nQualiSoft\n\nSOP = मानक संचालन प्रक्रिया\n"
+    assert parse_glossary(text) == {"QualiSoft": "QualiSoft", "SOP": "मानक संचालन प्रक्रिया"}
+
+
+@pytest.fixture
+def glossary_file(tmp_path, monkeypatch):
+    path = tmp_path / "glossary.txt"
+    path.write_text("QualiSoft\nSOP = मानक\n", encoding="utf-8")
+    monkeypatch.setenv("GLOSSARY_PATH", str(path))
+    monkeypatch.setattr(placeholders, "_default_protector", None)
+
+
+def test_request_glossary_is_merged_over_glossary_path(glossary_file):
+    assert glossary_protector() is placeholders.default_protector()
+    merged = glossary_protector({"SOP": "एसओपी", "Acme": "Acme"})
+    assert merged.glossary == {"QualiSoft": "QualiSoft", "SOP": "एसओपी", "Acme": "Acme"}
+    assert glossary_protector(["Acme"]).glossary["SOP"] == "मानक"
@@ -0,0 +1,119 @@
+import json
+import asyncio
+
+import pytest
+
+import src.service as service
+from src.service import MicroBatcher, TranslationService
+
+KEY = ("en_to_hi", "balanced", "null")
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """
+    Replace the model with one that upper-cases texts and records every batch.
+    """
+    calls = []
+
+    def translate_texts(texts, tokenizer, model, session=None, **options):
+        calls.append(list(texts))
+        session.sentences += len(texts)
+        session.translated += len(texts)
+        return [text.upper() for text in texts]
+
+    monkeypatch.setattr(service, "translate_texts", translate_texts)
+    monkeypatch.setattr(service, "load_translation_model", lambda direction, backend=None: (None, None))
+    return calls
+
+
+def make_batcher(**options):
+    # Any non-None memory keeps the batcher off the shared translation memory
+    return MicroBatcher(memory=object(), **options)
+
+
+def test_next_batch_takes_texts_round_robin():
+    async def run():
+        batcher = make_batcher(max_batch_texts=4)
+        for i in range(6):
+            await batcher.submit(KEY, "big", f"big {i}")
+        for i in range(2):
+            await batcher.submit(KEY, "small", f"small {i}")
+
+        _, first, requests = batcher._next_batch()
+        _, second, _ = batcher._next_batch()
+        return [item.text for item in first], requests, [item.text for item in second], batcher._pending
+
+    first, requests, second, pending = asyncio.run(run())
+    assert first == ["big 0", "small 0", "big 1", "small 1"]
+    assert requests == 2
+    assert second == ["big 2", "big 3", "big 4", "big 5"]
+    assert pending == 0
+
+
+def test_next_batch_drops_cancelled_texts():
+    async def run():
+        batcher = make_batcher(max_batch_texts=8, max_pending=4)
+        gone = [await batcher.submit(KEY, "gone", f"gone {i}") for i in range(3)]
+        await batcher.submit(KEY, "kept", "kept")
+        for future in gone:
+            future.cancel()
+
+        _, items, requests = batcher._next_batch()
+        # Capacity of dropped texts is released, so a new text is accepted at once
+        await asyncio.wait_for(batcher.submit(KEY, "late", "late"), timeout=1)
+        return [item.text for item in items], requests
+
+    texts, requests = asyncio.run(run())
+    assert texts == ["kept"]
+    assert requests == 1
+
+
+def test_concurrent_requests_share_batches(batches):
+    async def request(batcher, request_id, texts):
+        futures = [await batcher.submit(KEY, request_id, text) for text in texts]
+        return [await future for future in futures]
+
+    async def run():
+        batcher = make_batcher(window_ms=50, max_batch_texts=16)
+        batcher.start()
+        try:
+            results = await asyncio.gather(request(batcher, 1, ["a", "b", "c"]), request(batcher, 2, ["d", "e"]))
+        finally:
+            batcher._task.cancel()
+        return results, batcher.snapshot()
+
+    results, stats = asyncio.run(run())
+    assert results == [["A", "B", "C"], ["D", "E"]]
+    assert batches == [["a", "d", "b", "e", "c"]]
+    assert stats["cross_request_batches"] == 1
+    assert stats["texts"] == 5
+
+
+async def _exchange(port, raw):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+@pytest.mark.parametrize("raw", [
+    b"POST /translate HTTP/1.1\r\nContent-Length: lots\r\n\r\n",
+    b"POST /translate HTTP/1.1\r\nContent-Length: -1\r\n\r\n",
+    b"POST /translate HTTP/1.1\r\nContent-Length: 2\r\n\r\n[]",
+    b"POST /translate HTTP/1.1\r\nContent-Length: 31\r\n\r\n{\"texts\": [\"a\"], \"glossary\": 5}",
+])
+def test_malformed_requests_get_400(raw):
+    async def run():
+        server = await asyncio.start_server(TranslationService(make_batcher())._handle, "127.0.0.1", 0)
+        try:
+            return await _exchange(server.sockets[0].getsockname()[1], raw)
+        finally:
+            server.close()
+
+    status, body = asyncio.run(run())
+    assert status == 400
+    assert "error" in json.loads(body)
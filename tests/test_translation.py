@@ -0,0 +1,66 @@
+import pytest
+
+from src.translation import TranslationSession, is_untranslatable, make_batches
+
+
+def test_batches_are_sorted_by_length_and_cover_every_sentence():
+    lengths = [9, 1, 5, 3, 7, 2]
+    batches = make_batches(lengths, batch_size=2, max_tokens=1000)
+    assert batches == [[1, 5], [3, 2], [4, 0]]
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+
+
+def test_batch_size_limits_sentences_per_batch():
+    batches = make_batches([4] * 10, batch_size=4, max_tokens=1000)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_padded_size_stays_within_max_tokens():
+    lengths = [10, 10, 10, 30, 30, 100]
+    batches = make_batches(lengths, batch_size=16, max_tokens=60)
+    for batch in batches:
+        assert len(batch) == 1 or max(lengths[i] for i in batch) * len(batch) <= 60
+    assert batches == [[0, 1, 2], [3, 4], [5]]
+
+
+def test_sentence_longer_than_max_tokens_gets_its_own_batch():
+    assert make_batches([500, 5], batch_size=16, max_tokens=100) == [[1], [0]]
+
+
+def test_no_sentences_no_batches():
+    assert make_batches([]) == []
+
+
+@pytest.mark.parametrize("segment", [
+    "42",
+    "12/03/2024",
+    "-----",
+    "* * *",
+    "[P0] [P1]",
+    "[P0]-17",
+    "https://example.com/a?b=c",
+    "www.example.com.",
+    "ops@example.co.in",
+    "V1.0",
+    "v2.3.1,",
+])
+def test_segments_without_anything_to_translate(segment):
+    assert is_untranslatable(segment)
+
+
+@pytest.mark.parametrize("segment", [
+    "Hello world.",
+    "Section 4",
+    "[P0] follows the rules.",
+    "Visit https://example.com today",
+    "नमस्ते",
+])
+def test_text_is_translatable(segment):
+    assert not is_untranslatable(segment)
+
+
+def test_session_forgets_least_recently_used_sentences():
+    session = TranslationSession(max_seen=2)
+    session.remember({"a": "A", "b": "B"})
+    session.remember({"a": "A", "c": "C"})
+    assert list(session.seen) == ["a", "c"]